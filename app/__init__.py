@@ -1,26 +1,53 @@
+import os
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
-from flask_wtf.csrf import CSRFProtect
+from app.ratelimit import RateLimiter
+from app.replica import RoutingSession
+from app.config import config_from_env
+from app import templating, compression
 
-db = SQLAlchemy()
+# Okuma replikası için session seviyesinde bind seçimi (bkz. replica.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
-csrf = CSRFProtect()
+limiter = RateLimiter()
 
-def create_app():
+def create_app(config=None, with_views=True):
+    """Uygulamayı oluştur.
+
+    with_views=False: route'lar, formlar ve blueprint'ler yüklenmez. CLI
+    komutları, worker ve scriptler bu şekilde daha hızlı açılır.
+    """
     app = Flask(__name__)
     
     # Konfigürasyon
     app.config['SECRET_KEY'] = 'your-secret-key-here'
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///wegtu.db'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['UPLOAD_FOLDER'] = 'app/static/uploads'
+    app.config['UPLOAD_FOLDER'] = os.path.join(app.root_path, 'static', 'uploads')
     app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+    app.config['RATELIMIT_STORAGE_URL'] = 'memory://'  # Çoklu süreç için redis://...
+    app.config['STREAM_COMMENTS_THRESHOLD'] = 100  # Bu sayıdan fazla yorumda sayfa akışlı render edilir
+    app.config['PROXY_COUNT'] = 0  # Önündeki güvenilen proxy sayısı (load balancer)
+    
+    # Ortam değişkenleri varsayılanları, script/benchmark'ların verdiği ayarlar ikisini de ezer
+    app.config.update(config_from_env())
+    if config:
+        app.config.update(config)
+    
+    # Proxy arkasında istemci IP'si X-Forwarded-For'dan okunur; aksi halde
+    # IP bazlı rate limitler tüm istemciler için tek sayaç olur
+    if app.config['PROXY_COUNT']:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        count = app.config['PROXY_COUNT']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=count, x_proto=count, x_host=count)
     
     # Uzantıları başlat
     db.init_app(app)
     login_manager.init_app(app)
-    csrf.init_app(app)
+    limiter.init_app(app)
+    templating.init_app(app)
+    compression.init_app(app)
     
     # Login manager ayarları
     login_manager.login_view = 'auth.login'
@@ -33,6 +60,29 @@ def create_app():
         from app.models import User
         return User.query.get(int(user_id))
     
+    # CLI komutları
+    from app import analytics, tiers, purge, jobs, tasks, archive, schema
+    tiers.init_app(app)
+    analytics.init_app(app)
+    purge.init_app(app)
+    jobs.init_app(app)
+    archive.init_app(app)
+    schema.init_app(app)
+    
+    if not with_views:
+        return app
+    
+    # CSRF (flask_wtf/wtforms) sadece formlu view'lar için yüklenir
+    from flask_wtf.csrf import CSRFProtect
+    CSRFProtect(app)
+    
+    from app import notifications, sessions, replica
+    notifications.init_app(app)
+    
+    # Çok sunuculu mod: paylaşılan oturum deposu ve okuma replikası
+    sessions.init_app(app)
+    replica.init_app(app)
+    
     # Blueprint'leri kaydet
     from app.routes import main_bp, auth_bp
     app.register_blueprint(main_bp)
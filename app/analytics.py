@@ -0,0 +1,192 @@
+import click
+from datetime import datetime
+from flask.cli import with_appcontext
+from sqlalchemy import select, union_all, update
+from sqlalchemy.dialects.sqlite import insert
+from . import db
+from .models import Vote, VoteHourlyBucket, RollupCursor, PollArchive
+from .tiers import tier_rules
+
+CURSOR_NAME = 'vote_hourly'
+
+def tier_for_weight(weight):
+    """Oy ağırlığından tier etiketi (get_vote_weight'in tersi)"""
+    return tier_rules.tier_for_weight(weight)
+
+def _ensure_cursor():
+    """Cursor satırını yoksa oluştur (aynı anda çalışan işler çakışmaz)"""
+    db.session.execute(
+        insert(RollupCursor).values(name=CURSOR_NAME, last_id=0).on_conflict_do_nothing(index_elements=['name'])
+    )
+    db.session.commit()
+
+def _claim_batch(start, end):
+    """Cursor hâlâ `start`'taysa `end`'e ilerlet; parti bu çalışmaya ait olur.
+
+    Koşullu UPDATE aynı transaction'daki upsert ile birlikte commit edilir.
+    Başka bir çalışma partiyi önce aldıysa satır güncellenmez, False döner.
+    """
+    result = db.session.execute(
+        update(RollupCursor)
+        .where(RollupCursor.name == CURSOR_NAME, RollupCursor.last_id == start)
+        .values(last_id=end)
+    )
+    return result.rowcount == 1
+
+def rollup_votes(batch_size=50000):
+    """Son özetlemeden bu yana gelen oyları saatlik kovalara ekle.
+
+    Oylar id sırasıyla, `batch_size`'lık aralıklar halinde tek bir GROUP BY
+    sorgusuyla toplanır ve kovalara upsert edilir. Her parti cursor'ın
+    koşullu ilerletilmesiyle alınır ve kendi transaction'ında commit edilir:
+    iş yarıda kesilse bile kaldığı yerden devam eder, aynı anda çalışan iki
+    özetleme aynı oyları iki kez saymaz. İşlenen oy sayısını döndürür.
+    """
+    processed = 0
+    _ensure_cursor()
+    max_id = db.session.query(db.func.max(Vote.id)).scalar() or 0
+
+    while True:
+        start = db.session.query(RollupCursor.last_id).filter_by(name=CURSOR_NAME).scalar()
+        if start >= max_id:
+            break
+        end = min(start + batch_size, max_id)
+        if not _claim_batch(start, end):
+            db.session.rollback()  # Başka bir çalışma aldı, cursor'ı yeniden oku
+            continue
+
+        hour = db.func.strftime('%Y-%m-%d %H:00:00', Vote.created_at)
+        rows = (
+            db.session.query(
+                Vote.poll_id, Vote.poll_option_id, Vote.weight, hour,
+                db.func.count(Vote.id), db.func.sum(Vote.weight)
+            )
+            .filter(Vote.id > start, Vote.id <= end)
+            .group_by(Vote.poll_id, Vote.poll_option_id, Vote.weight, hour)
+            .all()
+        )
+
+        if rows:
+            stmt = insert(VoteHourlyBucket)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['poll_option_id', 'weight', 'hour'],
+                set_={
+                    'vote_count': VoteHourlyBucket.vote_count + stmt.excluded.vote_count,
+                    'weight_sum': VoteHourlyBucket.weight_sum + stmt.excluded.weight_sum
+                }
+            )
+            db.session.execute(stmt, [
+                {
+                    'poll_id': poll_id,
+                    'poll_option_id': option_id,
+                    'weight': weight,
+                    'hour': datetime.strptime(bucket, '%Y-%m-%d %H:%M:%S'),
+                    'vote_count': count,
+                    'weight_sum': weight_sum
+                }
+                for poll_id, option_id, weight, bucket, count, weight_sum in rows
+            ])
+            processed += sum(row[4] for row in rows)
+
+        db.session.commit()
+
+    return processed
+
+def rebuild_rollups():
+    """Tüm kovaları silip baştan hesapla (geçmiş oylar değiştiğinde).
+
+    Arşivlenmiş anketlerin oyları artık tabloda olmadığı için kovaları korunur.
+    """
+    _ensure_cursor()
+    archived = db.session.query(PollArchive.poll_id)
+    VoteHourlyBucket.query.filter(VoteHourlyBucket.poll_id.not_in(archived)).delete(synchronize_session=False)
+    db.session.execute(update(RollupCursor).where(RollupCursor.name == CURSOR_NAME).values(last_id=0))
+    db.session.commit()
+    return rollup_votes()
+
+def _bucket_rows(poll_id):
+    """Anketin kova satırları ve henüz özetlenmemiş oyların aynı biçimdeki toplamı.
+
+    Özetleme istek içinde çalışmaz; cursor'dan sonraki oylar (poll_id
+    indeksiyle) okunurken gruplanır, böylece sonuçlar her zaman günceldir.
+    """
+    last_id = db.session.query(RollupCursor.last_id).filter_by(name=CURSOR_NAME).scalar() or 0
+    # Kovalarla aynı saat biçimi, aynı saatin satırları birlikte gruplansın
+    hour = db.func.strftime('%Y-%m-%d %H:00:00.000000', Vote.created_at)
+    stored = (
+        select(VoteHourlyBucket.poll_option_id, VoteHourlyBucket.weight, VoteHourlyBucket.hour,
+               VoteHourlyBucket.vote_count, VoteHourlyBucket.weight_sum)
+        .where(VoteHourlyBucket.poll_id == poll_id)
+    )
+    pending = (
+        select(Vote.poll_option_id, Vote.weight, hour, db.func.count(Vote.id), db.func.sum(Vote.weight))
+        .where(Vote.poll_id == poll_id, Vote.id > last_id)
+        .group_by(Vote.poll_option_id, Vote.weight, hour)
+    )
+    return union_all(stored, pending).subquery()
+
+def poll_analytics(poll_id):
+    """Anketin ağırlıklı sıralaması, tier dağılımı ve saatlik oy serisi"""
+    bucket = _bucket_rows(poll_id).c
+    ranking = (
+        db.session.query(bucket.poll_option_id, db.func.sum(bucket.vote_count), db.func.sum(bucket.weight_sum))
+        .group_by(bucket.poll_option_id)
+        .order_by(db.func.sum(bucket.weight_sum).desc())
+        .all()
+    )
+    by_option_tier = (
+        db.session.query(bucket.poll_option_id, bucket.weight, db.func.sum(bucket.vote_count))
+        .group_by(bucket.poll_option_id, bucket.weight)
+        .all()
+    )
+    hourly = (
+        db.session.query(bucket.hour, db.func.sum(bucket.vote_count), db.func.sum(bucket.weight_sum))
+        .group_by(bucket.hour)
+        .order_by(bucket.hour)
+        .all()
+    )
+
+    tiers = {}
+    option_tiers = {}
+    for option_id, weight, count in by_option_tier:
+        tier = tier_for_weight(weight)
+        tiers[tier] = tiers.get(tier, 0) + count
+        per_option = option_tiers.setdefault(option_id, {})
+        per_option[tier] = per_option.get(tier, 0) + count
+
+    return {
+        'ranking': [
+            {'option_id': option_id, 'vote_count': count, 'total_weight': weight_sum,
+             'tiers': option_tiers.get(option_id, {})}
+            for option_id, count, weight_sum in ranking
+        ],
+        'tiers': dict(sorted(tiers.items(), key=lambda item: item[0] or 0)),
+        'hourly': [
+            {'hour': hour, 'vote_count': count, 'total_weight': weight_sum}
+            for hour, count, weight_sum in hourly
+        ],
+        'vote_count': sum(count for _, count, _ in ranking),
+        'total_weight': sum(weight_sum for _, _, weight_sum in ranking)
+    }
+
+def hourly_rows(poll_id):
+    """CSV dışa aktarımı için (saat, seçenek, ağırlık, oy, puan) satırları"""
+    bucket = _bucket_rows(poll_id).c
+    return (
+        db.session.query(bucket.hour, bucket.poll_option_id, bucket.weight,
+                         db.func.sum(bucket.vote_count), db.func.sum(bucket.weight_sum))
+        .group_by(bucket.hour, bucket.poll_option_id, bucket.weight)
+        .order_by(bucket.hour, bucket.poll_option_id, bucket.weight)
+        .all()
+    )
+
+@click.command('rollup-votes')
+@click.option('--rebuild', is_flag=True, help='Tüm kovaları baştan hesapla')
+@with_appcontext
+def rollup_votes_command(rebuild):
+    """Yeni oyları saatlik analitik kovalarına işle"""
+    processed = rebuild_rollups() if rebuild else rollup_votes()
+    click.echo(f'{processed} oy işlendi.')
+
+def init_app(app):
+    app.cli.add_command(rollup_votes_command)
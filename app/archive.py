@@ -0,0 +1,264 @@
+import array
+import calendar
+import gzip
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+from functools import lru_cache
+from types import SimpleNamespace
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import and_, update
+from . import db
+from .models import Poll, Vote, Comment, User, PollArchive
+from .analytics import rollup_votes
+from .purge import delete_in_batches
+
+ARCHIVE_VERSION = 1
+
+# Oy dosyasının sütunları: (ad, array tip kodu)
+VOTE_COLUMNS = (('user_id', 'i'), ('poll_option_id', 'i'), ('weight', 'i'), ('created_at', 'q'))
+
+def archive_paths(poll_id):
+    """(oy dosyası, yorum dosyası) yolları"""
+    folder = current_app.config['ARCHIVE_FOLDER']
+    return (os.path.join(folder, f'poll-{poll_id}.votes.gz'),
+            os.path.join(folder, f'poll-{poll_id}.comments.json.gz'))
+
+def remove_archive_files(poll_id):
+    for path in archive_paths(poll_id):
+        if os.path.exists(path):
+            os.remove(path)
+
+def _adjust_archived_votes(user_ids, delta):
+    """Arşivdeki oyların profil sayacına yansıması (anket başına kullanıcı bir oy)"""
+    user_ids = sorted(set(user_ids))
+    for start in range(0, len(user_ids), 5000):
+        db.session.execute(
+            update(User)
+            .where(User.id.in_(user_ids[start:start + 5000]))
+            .values(archived_vote_count=User.archived_vote_count + delta)
+        )
+
+def drop_archive(poll_id):
+    """Silinen anketin arşivini kaldır.
+
+    Oy verenlerin archived_vote_count'u geri alınır ve PollArchive kaydı aynı
+    transaction'da silinir; dosyalar ancak bundan sonra kaldırılır. İş yarıda
+    kalıp tekrar çalışırsa kayıt olmadığı için sayaçlar iki kez düşmez.
+    """
+    archive = PollArchive.query.filter_by(poll_id=poll_id).first()
+    if archive is not None:
+        if os.path.exists(archive.votes_path):
+            _, columns = read_vote_columns(archive.votes_path)
+            _adjust_archived_votes(columns['user_id'], -1)
+        else:
+            current_app.logger.warning('Anket %s arşiv dosyası yok, oy sayaçları düzeltilemedi', poll_id)
+        db.session.delete(archive)
+        db.session.commit()
+    remove_archive_files(poll_id)
+
+def _replace(tmp_path, path):
+    """Yazılan geçici dosyayı diske indirip hedefin yerine koy"""
+    with open(tmp_path, 'rb') as handle:
+        os.fsync(handle.fileno())
+    os.replace(tmp_path, path)
+
+def write_vote_columns(path, poll_id, columns):
+    """Oyları sütun sütun paketlenmiş, gzip'li tek dosyaya yaz.
+
+    Dosya bir JSON başlık satırı ve ardından her sütunun ham dizisinden
+    oluşur. Aynı tipteki değerler yan yana durduğu için iyi sıkışır.
+    """
+    header = {
+        'version': ARCHIVE_VERSION,
+        'poll_id': poll_id,
+        'rows': len(columns['user_id']),
+        'byteorder': sys.byteorder,
+        'columns': [[name, code, columns[name].itemsize] for name, code in VOTE_COLUMNS]
+    }
+    tmp_path = path + '.tmp'
+    with gzip.open(tmp_path, 'wb', compresslevel=6) as handle:
+        handle.write(json.dumps(header).encode('utf-8') + b'\n')
+        for name, _ in VOTE_COLUMNS:
+            handle.write(columns[name].tobytes())
+    _replace(tmp_path, path)
+
+def read_vote_columns(path):
+    """Arşivlenmiş oyları (başlık, {sütun: array}) olarak oku"""
+    with gzip.open(path, 'rb') as handle:
+        header = json.loads(handle.readline())
+        columns = {}
+        for name, code, itemsize in header['columns']:
+            values = array.array(code)
+            values.frombytes(handle.read(header['rows'] * itemsize))
+            if header['byteorder'] != sys.byteorder:
+                values.byteswap()
+            columns[name] = values
+    return header, columns
+
+def write_comments(path, comments):
+    tmp_path = path + '.tmp'
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as handle:
+        json.dump(comments, handle, ensure_ascii=False, separators=(',', ':'))
+    _replace(tmp_path, path)
+
+@lru_cache(maxsize=64)
+def _read_comments(path, archived_at):
+    with gzip.open(path, 'rt', encoding='utf-8') as handle:
+        return tuple(json.load(handle))
+
+def archived_comments(archive):
+    """Arşivdeki yorumları şablonun beklediği biçimde (yeniden eskiye) döndür"""
+    rows = _read_comments(archive.comments_path, archive.archived_at)
+    author_ids = {row['user_id'] for row in rows}
+    authors = {user.id: user for user in User.query.filter(User.id.in_(author_ids))} if author_ids else {}
+    return [
+        SimpleNamespace(id=row['id'], body=row['body'], author=authors.get(row['user_id']),
+                        timestamp=datetime.fromisoformat(row['timestamp']))
+        for row in reversed(rows)
+        if row['user_id'] in authors
+    ]
+
+def archived_results(archive, options):
+    """Önceden hesaplanmış sonuçlar, poll_detail'deki `results` biçiminde"""
+    tallies = json.loads(archive.tallies)
+    results = {}
+    for option in options:
+        tally = tallies.get(str(option.id), {})
+        results[option.id] = {
+            'design': option.design,
+            'total_weight': tally.get('total_weight', 0),
+            'vote_count': tally.get('vote_count', 0)
+        }
+    return results
+
+def _snapshot(poll_id, batch_size):
+    """Anketin oylarını sütunlara, yorumlarını listeye id sırasıyla topla"""
+    columns = {name: array.array(code) for name, code in VOTE_COLUMNS}
+    tallies = {}
+    last_vote_id = 0
+    while True:
+        rows = (
+            db.session.query(Vote.id, Vote.user_id, Vote.poll_option_id, Vote.weight, Vote.created_at)
+            .filter(Vote.poll_id == poll_id, Vote.id > last_vote_id)
+            .order_by(Vote.id)
+            .limit(batch_size)
+            .all()
+        )
+        for vote_id, user_id, option_id, weight, created_at in rows:
+            columns['user_id'].append(user_id)
+            columns['poll_option_id'].append(option_id)
+            columns['weight'].append(weight)
+            columns['created_at'].append(calendar.timegm(created_at.utctimetuple()) if created_at else 0)
+            tally = tallies.setdefault(str(option_id), {'vote_count': 0, 'total_weight': 0})
+            tally['vote_count'] += 1
+            tally['total_weight'] += weight
+        if rows:
+            last_vote_id = rows[-1][0]
+        if len(rows) < batch_size:
+            break
+
+    comments = [
+        {'id': comment_id, 'user_id': user_id, 'body': body, 'timestamp': timestamp.isoformat()}
+        for comment_id, user_id, body, timestamp in
+        db.session.query(Comment.id, Comment.user_id, Comment.body, Comment.timestamp)
+        .filter(Comment.poll_id == poll_id)
+        .order_by(Comment.id)
+    ]
+    last_comment_id = comments[-1]['id'] if comments else 0
+    return columns, tallies, last_vote_id, comments, last_comment_id
+
+def archive_poll(poll, batch_size=20000, echo=None):
+    """Kapanmış anketin oylarını ve yorumlarını arşive taşı.
+
+    Önce analitik kovaları güncellenir, sonra oylar ve yorumlar dosyaya
+    yazılır ve geri okunarak doğrulanır. Sonuçlar PollArchive'a yazıldıktan
+    sonra sıcak tablolardaki satırlar partiler halinde silinir. Silme yarıda
+    kalırsa tekrar çalıştırıldığında sadece silme adımı devam eder.
+    """
+    if poll.is_active or poll.deleted_at is not None:
+        raise ValueError(f'Anket {poll.id} arşivlenemez: sadece kapanmış anketler arşivlenir.')
+
+    archive = poll.archive
+    if archive is None:
+        rollup_votes()  # Arşivlenen oylar analitik ekranında görünmeye devam etsin
+        os.makedirs(current_app.config['ARCHIVE_FOLDER'], exist_ok=True)
+        votes_path, comments_path = archive_paths(poll.id)
+
+        columns, tallies, last_vote_id, comments, last_comment_id = _snapshot(poll.id, batch_size)
+        write_vote_columns(votes_path, poll.id, columns)
+        write_comments(comments_path, comments)
+
+        header, _ = read_vote_columns(votes_path)
+        if header['rows'] != len(columns['user_id']):
+            raise RuntimeError(f'Anket {poll.id} arşivi doğrulanamadı.')
+
+        archive = PollArchive(
+            poll_id=poll.id,
+            votes_path=votes_path,
+            comments_path=comments_path,
+            tallies=json.dumps(tallies),
+            vote_count=len(columns['user_id']),
+            comment_count=len(comments),
+            last_vote_id=last_vote_id,
+            last_comment_id=last_comment_id,
+            size_bytes=os.path.getsize(votes_path) + os.path.getsize(comments_path)
+        )
+        db.session.add(archive)
+
+        # Profildeki oy sayısı arşivlenen oyları da kapsasın
+        _adjust_archived_votes(columns['user_id'], 1)
+        db.session.commit()
+        if echo:
+            echo(f'Anket {poll.id}: {archive.vote_count} oy, {archive.comment_count} yorum '
+                 f'arşivlendi ({archive.size_bytes} bayt)')
+
+    if archive.status != 'done':
+        votes = delete_in_batches(Vote, and_(Vote.poll_id == poll.id, Vote.id <= archive.last_vote_id), batch_size)
+        comments = delete_in_batches(
+            Comment, and_(Comment.poll_id == poll.id, Comment.id <= archive.last_comment_id), batch_size
+        )
+        archive.status = 'done'
+        db.session.commit()
+        if echo:
+            echo(f'Anket {poll.id}: {votes} oy, {comments} yorum sıcak tablolardan silindi')
+    return archive
+
+def archivable_polls(older_than_days=0):
+    """Arşivlenecek (veya arşivi yarıda kalmış) kapanmış anketler"""
+    query = (
+        Poll.query.outerjoin(PollArchive)
+        .filter(Poll.is_active == False, Poll.deleted_at == None)
+        .filter(db.or_(PollArchive.id == None, PollArchive.status != 'done'))
+    )
+    if older_than_days:
+        query = query.filter(Poll.updated_at < datetime.utcnow() - timedelta(days=older_than_days))
+    return query.order_by(Poll.id).all()
+
+@click.command('archive-polls')
+@click.option('--poll-id', type=int, help='Sadece bu anketi arşivle')
+@click.option('--older-than', default=0, show_default=True, help='En az bu kadar gündür güncellenmemiş anketler')
+@click.option('--batch-size', default=20000, show_default=True)
+@with_appcontext
+def archive_polls_command(poll_id, older_than, batch_size):
+    """Kapanmış anketlerin oylarını ve yorumlarını arşiv dosyalarına taşı"""
+    if poll_id:
+        polls = [Poll.query.filter_by(id=poll_id, deleted_at=None).first()]
+        if polls[0] is None:
+            raise click.ClickException(f'Anket {poll_id} bulunamadı.')
+    else:
+        polls = archivable_polls(older_than)
+
+    for poll in polls:
+        try:
+            archive_poll(poll, batch_size, echo=click.echo)
+        except ValueError as exc:
+            raise click.ClickException(str(exc))
+    click.echo(f'{len(polls)} anket arşivlendi.')
+
+def init_app(app):
+    app.config.setdefault('ARCHIVE_FOLDER', os.path.join(app.instance_path, 'archive'))
+    app.cli.add_command(archive_polls_command)
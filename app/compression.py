@@ -0,0 +1,137 @@
+import gzip
+import os
+import zlib
+import click
+from flask import request, current_app
+from flask.cli import with_appcontext
+
+try:
+    import brotli
+except ImportError:  # Opsiyonel: kurulu değilse sadece gzip kullanılır
+    brotli = None
+
+DEFAULT_MIMETYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+    'application/javascript', 'application/json', 'image/svg+xml'
+}
+
+# Derleme sırasında önceden sıkıştırılacak statik dosyalar
+PRECOMPRESS_EXTENSIONS = ('.css', '.js', '.svg', '.json')
+
+def _accepted_encoding():
+    """İstemcinin kabul ettiği en iyi sıkıştırma yöntemini seç"""
+    accept = request.accept_encodings
+    if brotli is not None and accept['br']:
+        return 'br'
+    if accept['gzip']:
+        return 'gzip'
+    return None
+
+def _compress(data, encoding, level):
+    if encoding == 'br':
+        return brotli.compress(data, quality=min(level, 11))
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+def _stream_gzip(chunks, level, flush_size):
+    """Akışlı yanıtı parça parça sıkıştır.
+
+    Jinja çok küçük parçalar üretir; her birinde flush etmek oranı bozar.
+    Bu yüzden en az `flush_size` bayt biriktikçe istemciye gönderilir.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    pending = 0
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        data = compressor.compress(chunk)
+        pending += len(chunk)
+        if pending >= flush_size:
+            data += compressor.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+        if data:
+            yield data
+    yield compressor.flush()
+
+def _precompressed_path(encoding):
+    """Statik dosya için önceden sıkıştırılmış kopya varsa yolunu döndür"""
+    if request.endpoint != 'static' or not request.view_args:
+        return None
+    source = os.path.join(current_app.static_folder, request.view_args['filename'])
+    candidate = source + ('.br' if encoding == 'br' else '.gz')
+    try:
+        if os.path.getmtime(candidate) >= os.path.getmtime(source):
+            return candidate
+    except OSError:
+        pass
+    return None
+
+def compress_response(response):
+    """Uygun yanıtları gzip/brotli ile sıkıştır (after_request)"""
+    config = current_app.config
+    if (not config['COMPRESS_ENABLED']
+            or response.status_code != 200
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in config['COMPRESS_MIMETYPES']):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = _accepted_encoding()
+    if encoding is None:
+        return response
+
+    if response.direct_passthrough:
+        # send_file yanıtı: sadece derleme sırasında hazırlanmış kopyayı kullan
+        path = _precompressed_path(encoding)
+        if path is None:
+            return response
+        with open(path, 'rb') as handle:
+            response.direct_passthrough = False
+            response.set_data(handle.read())
+    elif response.is_streamed:
+        # Akışlı şablonlar: ilk baytlar beklemeden gitsin diye parça parça sıkıştır
+        if not request.accept_encodings['gzip']:
+            return response
+        response.response = _stream_gzip(response.response, config['COMPRESS_LEVEL'], config['COMPRESS_STREAM_FLUSH_SIZE'])
+        response.headers.pop('Content-Length', None)
+        encoding = 'gzip'
+    else:
+        data = response.get_data()
+        if len(data) < config['COMPRESS_MIN_SIZE']:
+            return response
+        response.set_data(_compress(data, encoding, config['COMPRESS_LEVEL']))
+
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+@click.command('precompress-static')
+@with_appcontext
+def precompress_static_command():
+    """Statik CSS/JS dosyalarının .gz (ve varsa .br) kopyalarını üret"""
+    static_folder = current_app.static_folder
+    level = 9
+    count = 0
+    for root, _, files in os.walk(static_folder):
+        for name in files:
+            if not name.endswith(PRECOMPRESS_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            with open(path, 'rb') as handle:
+                data = handle.read()
+            with open(path + '.gz', 'wb') as handle:
+                handle.write(gzip.compress(data, compresslevel=level, mtime=0))
+            if brotli is not None:
+                with open(path + '.br', 'wb') as handle:
+                    handle.write(brotli.compress(data, quality=11))
+            count += 1
+            click.echo(f'{os.path.relpath(path, static_folder)}: {len(data)} bayt sıkıştırıldı')
+    click.echo(f'{count} dosya hazırlandı.')
+
+def init_app(app):
+    app.config.setdefault('COMPRESS_ENABLED', True)
+    app.config.setdefault('COMPRESS_LEVEL', 6)
+    app.config.setdefault('COMPRESS_MIN_SIZE', 500)
+    app.config.setdefault('COMPRESS_STREAM_FLUSH_SIZE', 8192)
+    app.config.setdefault('COMPRESS_MIMETYPES', DEFAULT_MIMETYPES)
+
+    app.after_request(compress_response)
+    app.cli.add_command(precompress_static_command)
@@ -0,0 +1,48 @@
+"""Ortam değişkenlerinden okunan ayarlar
+
+Birden fazla sunucu aynı ayarlarla çalışabilsin diye gizli anahtar,
+veritabanı, paylaşılan depolar ve dosya klasörleri koddan değil ortamdan
+verilir. Tanımlı olmayan değişkenler create_app'teki varsayılanları korur.
+
+    SECRET_KEY             Tüm sunucularda aynı olmalı
+    DATABASE_URL           Birincil veritabanı
+    DATABASE_REPLICA_URL   Okuma replikası (GET view'ları için, opsiyonel)
+    SESSION_STORAGE_URL    sql (varsayılan), redis://... veya cookie
+    RATELIMIT_STORAGE_URL  memory:// veya redis://...
+    UPLOAD_FOLDER          Paylaşılan yükleme klasörü (örn. NFS)
+    ARCHIVE_FOLDER         Anket arşiv dosyaları
+    JOBS_EAGER             1 ise işler istek içinde çalışır
+    REPLICA_PIN_SECONDS    Yazmadan sonra okumaların birincilde kalacağı süre
+    PROXY_COUNT            Önündeki proxy sayısı; X-Forwarded-* başlıklarına
+                           sadece bu kadar atlama için güvenilir
+"""
+import os
+
+def _bool(value):
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+# Ortam değişkeni -> (config anahtarı, dönüştürücü)
+ENV_SETTINGS = {
+    'SECRET_KEY': ('SECRET_KEY', str),
+    'DATABASE_URL': ('SQLALCHEMY_DATABASE_URI', str),
+    'SESSION_STORAGE_URL': ('SESSION_STORAGE_URL', str),
+    'RATELIMIT_STORAGE_URL': ('RATELIMIT_STORAGE_URL', str),
+    'UPLOAD_FOLDER': ('UPLOAD_FOLDER', str),
+    'ARCHIVE_FOLDER': ('ARCHIVE_FOLDER', str),
+    'JOBS_EAGER': ('JOBS_EAGER', _bool),
+    'REPLICA_PIN_SECONDS': ('REPLICA_PIN_SECONDS', float),
+    'STREAM_COMMENTS_THRESHOLD': ('STREAM_COMMENTS_THRESHOLD', int),
+    'PROXY_COUNT': ('PROXY_COUNT', int),
+}
+
+def config_from_env(environ=None):
+    """Ortamda tanımlı ayarları config sözlüğü olarak döndür"""
+    environ = os.environ if environ is None else environ
+    config = {
+        key: convert(environ[name])
+        for name, (key, convert) in ENV_SETTINGS.items()
+        if environ.get(name)
+    }
+    if environ.get('DATABASE_REPLICA_URL'):
+        config['SQLALCHEMY_BINDS'] = {'replica': environ['DATABASE_REPLICA_URL']}
+    return config
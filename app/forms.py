@@ -1,7 +1,7 @@
 from flask_wtf import FlaskForm
 from flask_wtf.file import FileField, FileAllowed
 from wtforms import StringField, TextAreaField, PasswordField, BooleanField, SelectField, SubmitField, RadioField, DateTimeField, IntegerField
-from wtforms.validators import DataRequired, Email, EqualTo, Length, ValidationError
+from wtforms.validators import DataRequired, Email, EqualTo, Length, NumberRange, Optional, ValidationError
 from app.models import User
 
 class RegistrationForm(FlaskForm):
@@ -70,4 +70,5 @@ class EventForm(FlaskForm):
     location = StringField('Konum', validators=[Length(max=200)])
     event_date = DateTimeField('Etkinlik Tarihi', validators=[DataRequired()], format='%Y-%m-%d %H:%M')
     ticket_xp_reward = IntegerField('Bilet XP Ödülü', validators=[DataRequired()], default=20)
+    capacity = IntegerField('Kontenjan', validators=[Optional(), NumberRange(min=1)])
     submit = SubmitField('Etkinlik Oluştur')
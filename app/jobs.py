@@ -0,0 +1,298 @@
+import json
+import os
+import random
+import signal
+import socket
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import update
+from . import db
+from .models import Job
+
+# İsim -> fonksiyon; işler app/tasks.py içinde @job ile kaydedilir
+_registry = {}
+
+def job(name=None, max_attempts=5, eager=True):
+    """Fonksiyonu kuyruktan çalıştırılabilir bir iş olarak kaydet.
+
+    eager=False: JOBS_EAGER açıkken de istek içinde çalıştırılmaz, kuyruğa
+    yazılır (worker veya ilgili CLI komutu işler).
+    """
+    def decorator(func):
+        func.job_name = name or func.__name__
+        func.max_attempts = max_attempts
+        func.eager = eager
+        _registry[func.job_name] = func
+        return func
+    return decorator
+
+def _run_inline(func, payload):
+    """JOBS_EAGER: işi kuyruğa yazmadan isteğin içinde çalıştır"""
+    try:
+        func(**payload)
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception('İş başarısız: %s', func.job_name)
+
+def enqueue(name, delay=0, unique=False, **payload):
+    """İşi kuyruğa ekle ve commit et.
+
+    unique=True ise aynı isim ve parametrelerle bekleyen bir iş varsa yenisi
+    eklenmez (örn. analitik özetleme her oyda bir kez kuyruklanmasın).
+    JOBS_EAGER açıkken iş (eager=False değilse) kuyruğa yazılmadan hemen
+    çalıştırılır.
+    """
+    func = _registry.get(name)
+    if func is None:
+        raise LookupError(f'Tanımsız iş: {name}')
+
+    if current_app.config['JOBS_EAGER'] and func.eager:
+        db.session.commit()
+        _run_inline(func, payload)
+        return None
+
+    data = json.dumps(payload, sort_keys=True)
+    if unique:
+        existing = Job.query.filter_by(name=name, payload=data, status='queued').first()
+        if existing is not None:
+            return existing
+
+    queued = Job(
+        name=name,
+        payload=data,
+        max_attempts=func.max_attempts,
+        run_at=datetime.utcnow() + timedelta(seconds=delay)
+    )
+    db.session.add(queued)
+    db.session.commit()
+    return queued
+
+def claim_job(worker_name):
+    """Sırası gelmiş bir işi bu worker'a ayır.
+
+    Aday iş okunduktan sonra status='queued' koşullu UPDATE ile kilitlenir;
+    aynı işi iki worker birden alırsa sadece birinin UPDATE'i satır etkiler.
+    """
+    for _ in range(5):
+        now = datetime.utcnow()
+        job_id = (
+            db.session.query(Job.id)
+            .filter(Job.status == 'queued', Job.run_at <= now)
+            .order_by(Job.run_at, Job.id)
+            .limit(1)
+            .scalar()
+        )
+        if job_id is None:
+            db.session.commit()
+            return None
+
+        result = db.session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == 'queued')
+            .values(status='running', locked_by=worker_name, locked_at=now, attempts=Job.attempts + 1)
+        )
+        db.session.commit()
+        if result.rowcount == 1:
+            return db.session.get(Job, job_id)
+    return None
+
+def _backoff(attempts):
+    """Üstel bekleme süresi (saniye), üst sınır ve biraz rastgelelikle"""
+    config = current_app.config
+    delay = min(config['JOBS_BACKOFF_BASE'] * 2 ** (attempts - 1), config['JOBS_BACKOFF_MAX'])
+    return delay * random.uniform(1.0, 1.1)
+
+def execute_job(queued):
+    """Ayrılmış işi çalıştır; hata alırsa tekrar dene veya başarısız işaretle"""
+    job_id = queued.id
+    func = _registry.get(queued.name)
+    payload = json.loads(queued.payload)
+    started = time.perf_counter()
+    error = None
+
+    try:
+        if func is None:
+            raise LookupError(f'Tanımsız iş: {queued.name}')
+        func(**payload)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        error = traceback.format_exc(limit=5)
+
+    duration = (time.perf_counter() - started) * 1000
+    queued = db.session.get(Job, job_id)
+    queued.duration_ms = duration
+    queued.locked_by = None
+    queued.locked_at = None
+    if error is None:
+        queued.status = 'done'
+        queued.last_error = None
+        queued.finished_at = datetime.utcnow()
+    elif queued.attempts >= queued.max_attempts:
+        queued.status = 'failed'
+        queued.last_error = error
+        queued.finished_at = datetime.utcnow()
+    else:
+        queued.status = 'queued'
+        queued.last_error = error
+        queued.run_at = datetime.utcnow() + timedelta(seconds=_backoff(queued.attempts))
+    db.session.commit()
+
+    if error is not None:
+        current_app.logger.warning('İş hata aldı: %s #%s (deneme %s/%s)', queued.name, job_id,
+                                   queued.attempts, queued.max_attempts)
+    return queued
+
+def requeue_stale(timeout):
+    """Kilidi `timeout` saniyeden eski işleri (çöken worker) kuyruğa geri al"""
+    limit = datetime.utcnow() - timedelta(seconds=timeout)
+    result = db.session.execute(
+        update(Job)
+        .where(Job.status == 'running', Job.locked_at < limit)
+        .values(status='queued', locked_by=None, locked_at=None)
+    )
+    db.session.commit()
+    return result.rowcount
+
+def prune_jobs(hours):
+    """Tamamlanmış eski işleri sil, tablo büyümesin"""
+    limit = datetime.utcnow() - timedelta(hours=hours)
+    result = db.session.execute(
+        Job.__table__.delete().where(Job.status == 'done', Job.finished_at < limit)
+    )
+    db.session.commit()
+    return result.rowcount
+
+def job_stats():
+    """İş tipi başına durum sayıları ve son işlerin süre metrikleri"""
+    stats = {}
+    counts = db.session.query(Job.name, Job.status, db.func.count(Job.id)).group_by(Job.name, Job.status)
+    for name, status, count in counts:
+        stats.setdefault(name, {})[status] = count
+
+    for name, values in stats.items():
+        durations = sorted(
+            duration for (duration,) in
+            db.session.query(Job.duration_ms)
+            .filter(Job.name == name, Job.status == 'done')
+            .order_by(Job.id.desc())
+            .limit(1000)
+        )
+        if durations:
+            values['avg_ms'] = round(sum(durations) / len(durations), 2)
+            values['p95_ms'] = round(durations[min(len(durations) - 1, int(len(durations) * 0.95))], 2)
+    return stats
+
+class Worker:
+    """Kuyruktaki işleri `concurrency` thread ile çalıştıran süreç.
+
+    Her thread kendi app context'i (ve DB oturumu) ile iş alır. Ana thread
+    kilitli kalmış işleri geri alır ve eski işleri temizler. burst=True ise
+    kuyruk boşaldığında çıkar.
+    """
+
+    def __init__(self, app, concurrency=4, burst=False, echo=None):
+        self.app = app
+        self.concurrency = concurrency
+        self.burst = burst
+        self.echo = echo
+        self.name = f'{socket.gethostname()}:{os.getpid()}'
+        self.processed = 0
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def stop(self, *_):
+        self._stop.set()
+
+    def _loop(self, index):
+        config = self.app.config
+        with self.app.app_context():
+            while not self._stop.is_set():
+                queued = claim_job(f'{self.name}/{index}')
+                if queued is None:
+                    db.session.remove()
+                    if self.burst:
+                        return
+                    self._stop.wait(config['JOBS_POLL_INTERVAL'])
+                    continue
+
+                queued = execute_job(queued)
+                if self.echo:
+                    self.echo(f'{queued.name} #{queued.id}: {queued.status} ({queued.duration_ms:.1f} ms)')
+                with self._lock:
+                    self.processed += 1
+                db.session.remove()
+
+    def _maintain(self):
+        config = self.app.config
+        with self.app.app_context():
+            requeue_stale(config['JOBS_LOCK_TIMEOUT'])
+            prune_jobs(config['JOBS_RETENTION_HOURS'])
+            db.session.remove()
+
+    def run(self):
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self.stop)
+
+        self._maintain()
+        threads = [
+            threading.Thread(target=self._loop, args=(index,), name=f'job-worker-{index}', daemon=True)
+            for index in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+
+        last_maintenance = time.monotonic()
+        try:
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(timeout=1)
+                if time.monotonic() - last_maintenance > self.app.config['JOBS_MAINTENANCE_INTERVAL']:
+                    self._maintain()
+                    last_maintenance = time.monotonic()
+        except KeyboardInterrupt:
+            self.stop()
+            for thread in threads:
+                thread.join()
+        return self.processed
+
+@click.command('worker')
+@click.option('--concurrency', default=4, show_default=True, help='Aynı anda çalışacak iş sayısı')
+@click.option('--burst', is_flag=True, help='Kuyruk boşalınca çık')
+@click.option('--quiet', is_flag=True, help='İş başına satır yazma')
+@with_appcontext
+def worker_command(concurrency, burst, quiet):
+    """Kuyruktaki arka plan işlerini çalıştır"""
+    worker = Worker(current_app._get_current_object(), concurrency, burst, echo=None if quiet else click.echo)
+    click.echo(f'Worker {worker.name} başladı ({concurrency} thread).')
+    processed = worker.run()
+    click.echo(f'{processed} iş çalıştırıldı.')
+
+@click.command('jobs')
+@with_appcontext
+def jobs_command():
+    """İş kuyruğunun durumunu ve süre metriklerini göster"""
+    stats = job_stats()
+    if not stats:
+        click.echo('Kuyrukta iş yok.')
+    for name, values in sorted(stats.items()):
+        summary = ', '.join(f'{key}={value}' for key, value in values.items())
+        click.echo(f'{name}: {summary}')
+
+def init_app(app):
+    # Geliştirmede işler istek içinde çalışır; üretimde `flask worker` ile
+    app.config.setdefault('JOBS_EAGER', True)
+    app.config.setdefault('JOBS_POLL_INTERVAL', 1.0)
+    app.config.setdefault('JOBS_BACKOFF_BASE', 2)
+    app.config.setdefault('JOBS_BACKOFF_MAX', 300)
+    app.config.setdefault('JOBS_LOCK_TIMEOUT', 600)  # Bu süreden uzun süren iş çökmüş sayılır
+    app.config.setdefault('JOBS_RETENTION_HOURS', 24)
+    app.config.setdefault('JOBS_MAINTENANCE_INTERVAL', 60)
+
+    app.cli.add_command(worker_command)
+    app.cli.add_command(jobs_command)
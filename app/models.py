@@ -14,6 +14,7 @@ class User(UserMixin, db.Model):
     tier = db.Column(db.Integer, default=0)  # Tier 0: Aktif değil
     xp = db.Column(db.Integer, default=0)
     is_admin = db.Column(db.Boolean, default=False)  # Admin kontrolü
+    archived_vote_count = db.Column(db.Integer, default=0, nullable=False)  # Arşive taşınan oyları
     
     # Profil bilgileri (Tier 1'de açılacak)
     bio = db.Column(db.Text, nullable=True)
@@ -55,19 +56,22 @@ class Poll(db.Model):
     description = db.Column(db.Text, nullable=True)
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    deleted_at = db.Column(db.DateTime, nullable=True)  # Soft-delete: dolu ise gizli, arka planda silinir
     created_by_user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     
     # İlişkiler
     options = db.relationship('PollOption', backref='poll', lazy='dynamic', cascade='all, delete-orphan')
     votes = db.relationship('Vote', backref='poll', lazy='dynamic')
     comments = db.relationship('Comment', backref='poll', lazy='dynamic')
+    archive = db.relationship('PollArchive', backref='poll', uselist=False)
     
     def __repr__(self):
         return f'<Poll {self.title}>'
 
 class PollOption(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    poll_id = db.Column(db.Integer, db.ForeignKey('poll.id'), nullable=False)
+    poll_id = db.Column(db.Integer, db.ForeignKey('poll.id'), nullable=False, index=True)
     design_id = db.Column(db.Integer, db.ForeignKey('design.id'), nullable=False)
     
     # İlişkiler
@@ -82,10 +86,18 @@ class Vote(db.Model):
     poll_id = db.Column(db.Integer, db.ForeignKey('poll.id'), nullable=False)
     poll_option_id = db.Column(db.Integer, db.ForeignKey('poll_option.id'), nullable=False)
     weight = db.Column(db.Integer, default=1)
+    voter_tier = db.Column(db.Integer, nullable=True)  # Oy anındaki tier; kurallar değişince ağırlık buradan hesaplanır
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    # Unique constraint: bir kullanıcı bir ankete sadece bir kez oy verebilir
-    __table_args__ = (db.UniqueConstraint('user_id', 'poll_id', name='unique_user_poll_vote'),)
+    # Unique constraint: bir kullanıcı bir ankete sadece bir kez oy verebilir.
+    # poll_id indeksi: anket bazlı silme/arşivleme partileri tüm tabloyu taramasın.
+    # AUTOINCREMENT: silinen en büyük id tekrar verilmez; analitik cursor'ı ve
+    # arşiv, id'lerin sadece arttığına dayanır
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'poll_id', name='unique_user_poll_vote'),
+        db.Index('ix_vote_poll_id', 'poll_id'),
+        {'sqlite_autoincrement': True},
+    )
     
     def __repr__(self):
         return f'<Vote {self.id}>'
@@ -97,6 +109,12 @@ class Comment(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     poll_id = db.Column(db.Integer, db.ForeignKey('poll.id'), nullable=False)
     
+    # Bildirimler: anket başına yeni yorumlar ve kullanıcının yorum yaptığı anketler
+    __table_args__ = (
+        db.Index('ix_comment_poll_timestamp', 'poll_id', 'timestamp', 'user_id'),
+        db.Index('ix_comment_user_poll', 'user_id', 'poll_id'),
+    )
+    
     def __repr__(self):
         return f'<Comment {self.id}>'
 
@@ -136,13 +154,28 @@ class Event(db.Model):
     location = db.Column(db.String(200), nullable=True)
     event_date = db.Column(db.DateTime, nullable=False)
     ticket_xp_reward = db.Column(db.Integer, default=20)  # Bilet kesince kazanılacak XP
+    capacity = db.Column(db.Integer, nullable=True)  # Boşsa sınırsız
+    tickets_sold = db.Column(db.Integer, default=0, nullable=False)
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    deleted_at = db.Column(db.DateTime, nullable=True)  # Soft-delete: dolu ise gizli, arka planda silinir
     created_by_user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     
     # İlişkiler
     creator = db.relationship('User', backref='created_events')
     ticket_holders = db.relationship('EventTicket', backref='event', lazy='dynamic', cascade='all, delete-orphan')
+    waitlist = db.relationship('EventWaitlist', backref='event', lazy='dynamic', cascade='all, delete-orphan')
+    
+    @property
+    def is_sold_out(self):
+        return self.capacity is not None and (self.tickets_sold or 0) >= self.capacity
+    
+    @property
+    def seats_left(self):
+        if self.capacity is None:
+            return None
+        return max(self.capacity - (self.tickets_sold or 0), 0)
     
     def __repr__(self):
         return f'<Event {self.title}>'
@@ -158,7 +191,126 @@ class EventTicket(db.Model):
     user = db.relationship('User', backref='tickets')
     
     # Unique constraint: bir kullanıcı bir etkinliğe sadece bir kez bilet alabilir
-    __table_args__ = (db.UniqueConstraint('user_id', 'event_id', name='unique_user_event_ticket'),)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'event_id', name='unique_user_event_ticket'),
+        db.Index('ix_event_ticket_event_id', 'event_id'),
+    )
     
     def __repr__(self):
         return f'<EventTicket {self.ticket_number}>'
+
+class EventWaitlist(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # İlişkiler
+    user = db.relationship('User', backref='waitlisted_events')
+    
+    # Unique constraint: bir kullanıcı bekleme listesine bir kez girebilir
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'event_id', name='unique_user_event_waitlist'),
+        db.Index('ix_event_waitlist_event_id', 'event_id'),
+    )
+    
+    def __repr__(self):
+        return f'<EventWaitlist {self.event_id}:{self.user_id}>'
+
+class VoteHourlyBucket(db.Model):
+    # Oyların saatlik özetleri (analitik için ham oyları taramamak adına)
+    id = db.Column(db.Integer, primary_key=True)
+    poll_id = db.Column(db.Integer, db.ForeignKey('poll.id'), nullable=False, index=True)
+    poll_option_id = db.Column(db.Integer, db.ForeignKey('poll_option.id'), nullable=False)
+    weight = db.Column(db.Integer, nullable=False)
+    hour = db.Column(db.DateTime, nullable=False)
+    vote_count = db.Column(db.Integer, default=0, nullable=False)
+    weight_sum = db.Column(db.Integer, default=0, nullable=False)
+    
+    __table_args__ = (db.UniqueConstraint('poll_option_id', 'weight', 'hour', name='unique_option_weight_hour'),)
+    
+    def __repr__(self):
+        return f'<VoteHourlyBucket {self.poll_option_id} {self.hour}>'
+
+class RollupCursor(db.Model):
+    # Artımlı özetleme işlerinin en son işlediği kayıt id'si
+    name = db.Column(db.String(50), primary_key=True)
+    last_id = db.Column(db.Integer, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f'<RollupCursor {self.name}={self.last_id}>'
+
+class PurgeTask(db.Model):
+    # Soft-delete edilen içeriğin bağımlı kayıtlarını parça parça silen iş
+    id = db.Column(db.Integer, primary_key=True)
+    target_type = db.Column(db.String(20), nullable=False)  # poll, event
+    target_id = db.Column(db.Integer, nullable=False)
+    stage = db.Column(db.String(30), nullable=True)  # Kaldığı aşama (devam için)
+    deleted_rows = db.Column(db.Integer, default=0, nullable=False)
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending, running, done, failed
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (db.UniqueConstraint('target_type', 'target_id', name='unique_purge_target'),)
+    
+    def __repr__(self):
+        return f'<PurgeTask {self.target_type}:{self.target_id} {self.status}>'
+
+class Job(db.Model):
+    # Arka planda çalıştırılacak yan etki işleri (SQLite tabanlı kalıcı kuyruk)
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default='{}')  # JSON
+    status = db.Column(db.String(20), default='queued', nullable=False)  # queued, running, done, failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    max_attempts = db.Column(db.Integer, default=5, nullable=False)
+    run_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    locked_by = db.Column(db.String(100), nullable=True)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    duration_ms = db.Column(db.Float, nullable=True)
+    
+    __table_args__ = (db.Index('ix_job_status_run_at', 'status', 'run_at'),)
+    
+    def __repr__(self):
+        return f'<Job {self.id} {self.name} {self.status}>'
+
+class PollArchive(db.Model):
+    # Kapanmış anketin oyları/yorumları instance/archive altındaki dosyalara taşınır,
+    # sonuçlar burada önceden hesaplanmış olarak tutulur
+    id = db.Column(db.Integer, primary_key=True)
+    poll_id = db.Column(db.Integer, db.ForeignKey('poll.id'), unique=True, nullable=False)
+    votes_path = db.Column(db.String(300), nullable=False)
+    comments_path = db.Column(db.String(300), nullable=False)
+    tallies = db.Column(db.Text, nullable=False, default='{}')  # JSON: {seçenek_id: {vote_count, total_weight}}
+    vote_count = db.Column(db.Integer, default=0, nullable=False)
+    comment_count = db.Column(db.Integer, default=0, nullable=False)
+    last_vote_id = db.Column(db.Integer, default=0, nullable=False)  # Sadece bu id'ye kadarki satırlar silinir
+    last_comment_id = db.Column(db.Integer, default=0, nullable=False)
+    status = db.Column(db.String(20), default='deleting', nullable=False)  # deleting, done
+    size_bytes = db.Column(db.Integer, default=0, nullable=False)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<PollArchive {self.poll_id}>'
+
+class NotificationCursor(db.Model):
+    # Kullanıcının bildirimleri en son gördüğü an; bildirimler okunurken hesaplanır
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    last_seen_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<NotificationCursor {self.user_id}>'
+
+class ServerSession(db.Model):
+    # Sunucu taraflı oturum içeriği; cookie'de sadece id durur (bkz. sessions.py)
+    __tablename__ = 'server_session'
+    id = db.Column(db.String(64), primary_key=True)
+    data = db.Column(db.Text, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f'<ServerSession {self.id[:8]}>'
@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import case, select, union
+from sqlalchemy.dialects.sqlite import insert
+from . import db
+from .models import Vote, Comment, Poll, Event, EventTicket, NotificationCursor
+
+# Bildirimler yazılırken kullanıcı başına satır üretilmez (fan-out-on-read):
+# okunduğunda kullanıcının abonelikleri (oy verdiği/yorum yaptığı anketler,
+# bileti olan etkinlikler) son görülme zamanından sonraki değişikliklerle
+# birleştirilir. Kullanıcı başına sadece NotificationCursor tutulur.
+
+def last_seen(user_id):
+    cursor = db.session.get(NotificationCursor, user_id)
+    return cursor.last_seen_at if cursor else None
+
+def mark_seen(user_id, when=None):
+    """Kullanıcının son görülme zamanını ilerlet (upsert)"""
+    when = when or datetime.utcnow()
+    stmt = insert(NotificationCursor).values(user_id=user_id, last_seen_at=when)
+    db.session.execute(stmt.on_conflict_do_update(index_elements=['user_id'], set_={'last_seen_at': when}))
+    db.session.commit()
+
+def _window_start():
+    return datetime.utcnow() - timedelta(days=current_app.config['NOTIFICATIONS_WINDOW_DAYS'])
+
+def _since(user_id):
+    """Okunmamış sayılacak en eski zaman (hiç bakmamışsa pencere başı)"""
+    seen = last_seen(user_id)
+    window = _window_start()
+    return max(seen, window) if seen else window
+
+def _subscribed_polls(user_id):
+    """Kullanıcının oy verdiği veya yorum yaptığı anketler"""
+    return union(
+        select(Vote.poll_id).where(Vote.user_id == user_id),
+        select(Comment.poll_id).where(Comment.user_id == user_id)
+    )
+
+def _comment_filter(query, user_id, since):
+    # (poll_id, timestamp) indeksi sayesinde her anket için sadece yeni yorumlar taranır
+    return (
+        query.join(Poll, Poll.id == Comment.poll_id)
+        .filter(Comment.poll_id.in_(_subscribed_polls(user_id)))
+        .filter(Comment.timestamp > since, Comment.user_id != user_id)
+        .filter(Poll.deleted_at.is_(None))
+    )
+
+def _event_filter(query, user_id, since):
+    # updated_at sadece etkinlik bilgileri değişince ilerler (bilet satışı değil)
+    return (
+        query.join(EventTicket, EventTicket.event_id == Event.id)
+        .filter(EventTicket.user_id == user_id)
+        .filter(Event.updated_at > since, Event.updated_at > EventTicket.created_at)
+        .filter(Event.deleted_at.is_(None))
+    )
+
+def unread_count(user_id):
+    """Okunmamış bildirim sayısı, NOTIFICATIONS_MAX_BADGE ile sınırlı.
+
+    Sayım üst sınırda durduğu için çok sayıda yeni yorum olsa bile
+    sorgu maliyeti sınırlı kalır (rozet '99+' gösterir).
+    """
+    since = _since(user_id)
+    limit = current_app.config['NOTIFICATIONS_MAX_BADGE'] + 1
+    comments = _comment_filter(db.session.query(Comment.id), user_id, since).limit(limit).subquery()
+    events = _event_filter(db.session.query(Event.id), user_id, since).limit(limit).subquery()
+    total = (
+        db.session.query(db.func.count()).select_from(comments).scalar()
+        + db.session.query(db.func.count()).select_from(events).scalar()
+    )
+    return min(total, limit)
+
+def notification_feed(user_id, limit=50):
+    """Pencere içindeki bildirimler: anket başına yorum grupları ve güncellenen etkinlikler.
+
+    Her öğe için `unread` son görülmeden sonraki değişiklik sayısıdır.
+    """
+    seen = _since(user_id)
+    window = _window_start()
+
+    comment_groups = (
+        _comment_filter(
+            db.session.query(
+                Comment.poll_id, Poll.title,
+                db.func.count(Comment.id),
+                db.func.sum(case((Comment.timestamp > seen, 1), else_=0)),
+                db.func.max(Comment.timestamp)
+            ),
+            user_id, window
+        )
+        .group_by(Comment.poll_id, Poll.title)
+        .order_by(db.func.max(Comment.timestamp).desc())
+        .limit(limit)
+        .all()
+    )
+    events = (
+        _event_filter(db.session.query(Event), user_id, window)
+        .order_by(Event.updated_at.desc())
+        .limit(limit)
+        .all()
+    )
+
+    items = [
+        {'type': 'comments', 'poll_id': poll_id, 'title': title, 'count': count,
+         'unread': unread, 'timestamp': timestamp}
+        for poll_id, title, count, unread, timestamp in comment_groups
+    ]
+    items += [
+        {'type': 'event', 'event': event, 'title': event.title, 'count': 1,
+         'unread': 1 if event.updated_at > seen else 0, 'timestamp': event.updated_at}
+        for event in events
+    ]
+    items.sort(key=lambda item: item['timestamp'], reverse=True)
+    return items[:limit]
+
+def init_app(app):
+    app.config.setdefault('NOTIFICATIONS_WINDOW_DAYS', 30)  # Daha eski değişiklikler gösterilmez
+    app.config.setdefault('NOTIFICATIONS_MAX_BADGE', 99)
+    app.config.setdefault('NOTIFICATIONS_POLL_INTERVAL', 60)  # base.html rozet yenileme (saniye)
@@ -0,0 +1,140 @@
+import time
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import delete, select, update
+from . import db
+from .models import (Poll, PollOption, Vote, Comment, Event, EventTicket, EventWaitlist,
+                     VoteHourlyBucket, PollArchive, PurgeTask)
+
+# Her hedef tipi için sırayla boşaltılacak tablolar: (aşama, model, filtre sütunu)
+PURGE_STAGES = {
+    'poll': [
+        ('votes', Vote, Vote.poll_id),
+        ('comments', Comment, Comment.poll_id),
+        ('vote_buckets', VoteHourlyBucket, VoteHourlyBucket.poll_id),
+        ('options', PollOption, PollOption.poll_id),
+        ('archive', PollArchive, PollArchive.poll_id),
+        ('poll', Poll, Poll.id),
+    ],
+    'event': [
+        ('tickets', EventTicket, EventTicket.event_id),
+        ('waitlist', EventWaitlist, EventWaitlist.event_id),
+        ('event', Event, Event.id),
+    ],
+}
+
+def soft_delete(target):
+    """Anketi/etkinliği hemen gizle ve bağımlı kayıtlar için silme işi oluştur"""
+    target_type = 'poll' if isinstance(target, Poll) else 'event'
+    target.deleted_at = datetime.utcnow()
+    task = PurgeTask.query.filter_by(target_type=target_type, target_id=target.id).first()
+    if task is None:
+        task = PurgeTask(target_type=target_type, target_id=target.id)
+        db.session.add(task)
+    db.session.commit()
+    return task
+
+def delete_in_batches(model, condition, batch_size=5000, pause=0, progress=None):
+    """`condition`'a uyan satırları `batch_size`'lık DELETE'lerle sil.
+
+    Her parti ayrı commit edilir; `progress(silinen)` her partiden sonra
+    (commit'ten önce) çağrılır, böylece ilerleme aynı transaction'a yazılabilir.
+    """
+    deleted = 0
+    while True:
+        batch = select(model.id).where(condition).limit(batch_size)
+        result = db.session.execute(delete(model).where(model.id.in_(batch)))
+        deleted += result.rowcount
+        if progress:
+            progress(result.rowcount)
+        db.session.commit()
+        if result.rowcount < batch_size:
+            return deleted
+        if pause:
+            time.sleep(pause)  # Diğer yazıcılara nefes aldır
+
+def _claim_task(task_id):
+    """İşi koşullu UPDATE ile al; aynı işi iki çalışma aynı anda yürütmez.
+
+    Bekleyen ve hata almış işler alınabilir. 'running' bir iş ancak
+    PURGE_LOCK_TIMEOUT saniyedir ilerleme yazmadıysa (çöken worker) yeniden
+    alınır; her parti updated_at'i ilerletir.
+    """
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=current_app.config['PURGE_LOCK_TIMEOUT'])
+    result = db.session.execute(
+        update(PurgeTask)
+        .where(PurgeTask.id == task_id)
+        .where(PurgeTask.status.in_(('pending', 'failed'))
+               | ((PurgeTask.status == 'running') & (PurgeTask.updated_at < stale)))
+        .values(status='running', updated_at=now)
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+def run_purge_task(task_id, batch_size=5000, pause=0, echo=None):
+    """Silme işini kayıtlı aşamasından devam ettirerek tamamla.
+
+    Her tablo `batch_size`'lık DELETE'lerle boşaltılır ve her parti ayrı
+    commit edilir; böylece SQLite yazma kilidi kısa tutulur ve iş yarıda
+    kalırsa bir sonraki çalıştırmada kaldığı aşamadan devam eder. İş başka
+    bir çalışmada yürüyorsa None döner.
+    """
+    task = db.session.get(PurgeTask, task_id)
+    if task is None or task.status == 'done':
+        return task
+    if not _claim_task(task_id):
+        return None
+    db.session.refresh(task)
+
+    stages = PURGE_STAGES[task.target_type]
+    names = [name for name, _, _ in stages]
+    start = names.index(task.stage) if task.stage in names else 0
+
+    try:
+        for name, model, column in stages[start:]:
+            task.stage = name
+            db.session.commit()
+            if name == 'archive':
+                from .archive import drop_archive  # archive bu modülü import ediyor
+                drop_archive(task.target_id)
+
+            def progress(count):
+                task.deleted_rows += count
+                if echo:
+                    echo(f'{task.target_type}:{task.target_id} {name}: {task.deleted_rows} satır silindi')
+
+            delete_in_batches(model, column == task.target_id, batch_size, pause, progress)
+        task.status = 'done'
+        task.error = None
+        db.session.commit()
+    except Exception as exc:
+        db.session.rollback()
+        task.status = 'failed'
+        task.error = repr(exc)
+        db.session.commit()
+        raise
+    return task
+
+def run_pending_purges(batch_size=5000, echo=None):
+    """Bekleyen, yarıda kalmış veya hata almış silme işlerini çalıştır.
+
+    Başka bir çalışmanın yürüttüğü işler atlanır. Çalıştırılan iş sayısını döndürür.
+    """
+    task_ids = [task.id for task in PurgeTask.query.filter(PurgeTask.status != 'done').order_by(PurgeTask.id)]
+    return sum(run_purge_task(task_id, batch_size, echo=echo) is not None for task_id in task_ids)
+
+@click.command('purge')
+@click.option('--batch-size', default=5000, show_default=True)
+@with_appcontext
+def purge_command(batch_size):
+    """Soft-delete edilmiş içeriklerin bekleyen silme işlerini tamamla"""
+    count = run_pending_purges(batch_size, echo=click.echo)
+    click.echo(f'{count} silme işi tamamlandı.')
+
+def init_app(app):
+    app.config.setdefault('PURGE_BATCH_SIZE', 5000)
+    app.config.setdefault('PURGE_LOCK_TIMEOUT', 600)  # Bu süredir ilerlemeyen iş çökmüş sayılır
+    app.cli.add_command(purge_command)
@@ -0,0 +1,153 @@
+import threading
+import time
+from functools import wraps
+from flask import request, session, abort, make_response, current_app
+
+class MemoryStore:
+    """Süreç içi sayaç deposu (tek süreçli kurulumlar için)"""
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+        self._last_prune = 0
+
+    def incr(self, key, expire):
+        """Sayacı bir artır ve yeni değeri döndür"""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_prune > 60:
+                self._prune(now)
+            count, expires_at = self._counts.get(key, (0, now + expire))
+            count += 1
+            self._counts[key] = (count, expires_at)
+            return count
+
+    def get(self, key):
+        with self._lock:
+            entry = self._counts.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            return 0
+        return entry[0]
+
+    def _prune(self, now):
+        """Süresi dolan sayaçları temizle"""
+        self._counts = {k: v for k, v in self._counts.items() if v[1] >= now}
+        self._last_prune = now
+
+class RedisStore:
+    """Birden fazla süreç/sunucu arasında paylaşılan Redis sayaç deposu"""
+
+    def __init__(self, url):
+        import redis
+        self._client = redis.Redis.from_url(url)
+
+    def incr(self, key, expire):
+        pipe = self._client.pipeline()
+        pipe.incr(key)
+        pipe.expire(key, int(expire) + 1)
+        return pipe.execute()[0]
+
+    def get(self, key):
+        value = self._client.get(key)
+        return int(value) if value else 0
+
+def create_store(url):
+    """RATELIMIT_STORAGE_URL değerine göre sayaç deposu oluştur"""
+    if not url or url == 'memory://':
+        return MemoryStore()
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisStore(url)
+    raise ValueError(f'Desteklenmeyen rate limit deposu: {url}')
+
+class RateLimiter:
+    """Kayan pencere sayacı ile endpoint bazlı istek sınırlama.
+
+    Her limit için anahtar (IP veya kullanıcı id) başına mevcut ve önceki
+    pencerenin sayaçları tutulur; tahmini istek sayısı
+    önceki * (kalan oran) + mevcut olarak hesaplanır. Kontrol view
+    fonksiyonundan önce çalışır ve veritabanına dokunmaz; 'user' anahtarlı
+    limitler sunucu taraflı oturum kaydını okur (bkz. _key_for). Proxy
+    arkasında istemci IP'si için PROXY_COUNT ayarlanmalıdır.
+    """
+
+    def __init__(self, app=None):
+        self.store = None
+        self.enabled = True
+        self.overrides = {}
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('RATELIMIT_ENABLED', True)
+        app.config.setdefault('RATELIMIT_STORAGE_URL', 'memory://')
+        app.config.setdefault('RATELIMITS', {})
+
+        self.enabled = app.config['RATELIMIT_ENABLED']
+        self.overrides = app.config['RATELIMITS']
+        self.store = create_store(app.config['RATELIMIT_STORAGE_URL'])
+
+    def _record(self, name, allowed):
+        with self._stats_lock:
+            stats = self._stats.setdefault(name, {'allowed': 0, 'rejected': 0})
+            stats['allowed' if allowed else 'rejected'] += 1
+
+    def stats(self):
+        """Limit başına kabul edilen/reddedilen istek sayıları"""
+        with self._stats_lock:
+            return {name: dict(values) for name, values in self._stats.items()}
+
+    def hit(self, name, key, limit, period):
+        """İsteği say, limit aşıldıysa (False, bekleme süresi) döndür"""
+        now = time.time()
+        window = int(now // period)
+        elapsed_ratio = (now % period) / period
+
+        prefix = f'rl:{name}:{key}'
+        previous = self.store.get(f'{prefix}:{window - 1}')
+        current = self.store.incr(f'{prefix}:{window}', period * 2)
+
+        estimated = previous * (1 - elapsed_ratio) + current
+        allowed = estimated <= limit
+        self._record(name, allowed)
+
+        retry_after = int(period - (now % period)) + 1
+        return allowed, retry_after
+
+    def limit(self, name, limit, period, key='ip', methods=None, when=None):
+        """View'a `period` saniyede `limit` istek sınırı uygula.
+
+        key: 'ip' veya 'user' (oturumdaki kullanıcı id, yoksa IP).
+        methods: sadece bu HTTP metodlarını say (varsayılan: hepsi).
+        when: True döndüğünde sayılacak ek koşul (örn. form alanı kontrolü).
+        Değerler app.config['RATELIMITS'][name] = (limit, period) ile ezilebilir.
+        Bu dekoratör @login_required'ın üstüne yazılmalı ki DB'den önce çalışsın.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapped(*args, **kwargs):
+                if self.enabled and (methods is None or request.method in methods) and (when is None or when()):
+                    max_requests, window = self.overrides.get(name, (limit, period))
+                    allowed, retry_after = self.hit(name, self._key_for(key), max_requests, window)
+                    if not allowed:
+                        current_app.logger.warning('Rate limit aşıldı: %s (%s)', name, request.remote_addr)
+                        response = make_response('Çok fazla istek gönderdiniz. Lütfen biraz sonra tekrar deneyin.', 429)
+                        response.headers['Retry-After'] = str(retry_after)
+                        abort(response)
+                return view(*args, **kwargs)
+            return wrapped
+        return decorator
+
+    @staticmethod
+    def _key_for(key):
+        if key == 'user':
+            # Flask-Login kullanıcı id'sini oturumda tutar; User yüklemeye gerek yok.
+            # Sunucu taraflı oturumda bu, oturum kaydının okunması demektir
+            # (tek birincil anahtar sorgusu); 'user' limitleri zaten
+            # @login_required view'larda kullanılır. 'ip' limitleri oturuma
+            # dokunmaz, redleri veritabanına gitmez.
+            user_id = session.get('_user_id')
+            if user_id:
+                return f'user:{user_id}'
+        return f'ip:{request.remote_addr}'
@@ -0,0 +1,58 @@
+import time
+from functools import wraps
+from flask import current_app, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+# Okuma replikası yönlendirmesi
+#
+# DATABASE_REPLICA_URL verilirse SQLALCHEMY_BINDS['replica'] olarak eklenir.
+# Sadece @read_replica ile işaretlenmiş GET view'ları replikadan okur; diğer
+# her şey birincil veritabanını kullanır. İstek içinde bir yazma olursa
+# session o andan itibaren birincile döner. Yazma yapan kullanıcı
+# REPLICA_PIN_SECONDS boyunca birincilden okur, replika gecikmesi yüzünden
+# kendi oyunu/yorumunu görmeme durumu yaşanmaz.
+
+PRIMARY_UNTIL_KEY = '_primary_until'
+
+class RoutingSession(Session):
+    """session.info['read_replica'] açıkken okumaları replikaya yönlendiren session"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or isinstance(clause, UpdateBase):
+                # Yazma: bu istekte artık replikaya dönülmez
+                self.info['wrote'] = True
+                self.info['read_replica'] = False
+            elif self.info.get('read_replica'):
+                engine = self._db.engines.get('replica')
+                if engine is not None:
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def replica_enabled(app):
+    return 'replica' in (app.config.get('SQLALCHEMY_BINDS') or {})
+
+def read_replica(view):
+    """GET/HEAD isteklerinde view'ın sorgularını okuma replikasına yönlendir"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if (request.method in ('GET', 'HEAD') and replica_enabled(current_app)
+                and session.get(PRIMARY_UNTIL_KEY, 0) < time.time()):
+            current_app.extensions['sqlalchemy'].session.info['read_replica'] = True
+        return view(*args, **kwargs)
+    return wrapper
+
+def init_app(app):
+    app.config.setdefault('REPLICA_PIN_SECONDS', 5)
+    if not replica_enabled(app):
+        return
+
+    db = app.extensions['sqlalchemy']
+
+    @app.after_request
+    def pin_to_primary(response):
+        # Session her istekte scoped_session.remove ile kapanır, info onunla temizlenir
+        if db.session.info.get('wrote') and app.config['REPLICA_PIN_SECONDS']:
+            session[PRIMARY_UNTIL_KEY] = time.time() + app.config['REPLICA_PIN_SECONDS']
+        return response
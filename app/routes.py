@@ -1,11 +1,26 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, abort, current_app
+from flask import Blueprint, Response, render_template, stream_template, redirect, url_for, flash, request, abort, current_app, jsonify, get_flashed_messages, send_from_directory
+from flask_wtf.csrf import generate_csrf
 from flask_login import login_user, logout_user, login_required, current_user
 from werkzeug.utils import secure_filename
+from sqlalchemy import text
+from sqlalchemy.orm import joinedload
+import csv
+import io
 import os
 import secrets
-from . import db
-from .models import User, Design, Poll, PollOption, Vote, Comment, DesignCheckRequest, QRCode, Event, EventTicket
+from datetime import date
+from . import db, limiter
+from .models import User, Design, Poll, PollOption, Vote, Comment, DesignCheckRequest, QRCode, Event
 from .forms import RegistrationForm, LoginForm, EditProfileForm, DesignUploadForm, CreatePollForm, CommentForm, VoteForm, AddDesignsToPollForm, EventForm
+from .viewer_state import resolve_viewer_state, invalidate_viewer_state
+from .tickets import issue_ticket, TICKET_EXISTS, TICKET_WAITLISTED
+from .tiers import tier_rules
+from .analytics import poll_analytics, hourly_rows, tier_for_weight
+from .purge import soft_delete
+from .archive import archived_results, archived_comments
+from .notifications import notification_feed, unread_count, mark_seen
+from .jobs import enqueue, job_stats
+from .replica import read_replica
 
 # Blueprint'ler
 main_bp = Blueprint('main', __name__)
@@ -13,31 +28,33 @@ auth_bp = Blueprint('auth', __name__)
 
 # Helper fonksiyonlar
 def get_vote_weight(tier):
-    """Tier'a göre oy ağırlığını hesapla"""
-    if tier == 1:
-        return 1
-    elif tier == 2:
-        return 3
-    elif tier == 3:
-        return 5
-    else:
-        return 0  # Tier 0 oy kullanamaz
+    """Tier'a göre oy ağırlığını hesapla (Tier 0 oy kullanamaz)"""
+    return tier_rules.vote_weight(tier)
 
 def check_tier_upgrade(user):
     """Tier atlama kontrolü"""
-    TIER_2_XP = 100
-    TIER_3_XP = 500
-    
-    if user.tier == 1 and user.xp >= TIER_2_XP:
-        user.tier = 2
-        flash('Tebrikler! Tier 2\'ye yükseldiniz!', 'success')
-    elif user.tier == 2 and user.xp >= TIER_3_XP:
-        user.tier = 3
-        flash('Tebrikler! Tier 3\'e yükseldiniz!', 'success')
+    # Tier 0 hesaplar sadece QR ile aktifleşir
+    if user.tier >= 1:
+        new_tier = tier_rules.tier_for_xp(user.xp)
+        if new_tier > user.tier:
+            user.tier = new_tier
+            flash(f'Tebrikler! Tier {new_tier} seviyesine yükseldiniz!', 'success')
     
     db.session.add(user)
     db.session.commit()
 
+def award_xp_later(user, amount):
+    """XP ve tier güncellemesini arka plan işine bırak.
+
+    İş henüz çalışmamış olabileceği için tier atlama mesajı mevcut XP'den
+    tahmin edilerek gösterilir.
+    """
+    if user.tier >= 1:
+        new_tier = tier_rules.tier_for_xp(user.xp + amount)
+        if new_tier > user.tier:
+            flash(f'Tebrikler! Tier {new_tier} seviyesine yükseldiniz!', 'success')
+    enqueue('award_xp', user_id=user.id, amount=amount)
+
 def allowed_file(filename):
     """Dosya uzantısı kontrolü"""
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
@@ -49,10 +66,8 @@ def index():
     return render_template('index.html')
 
 @main_bp.route('/forum')
+@read_replica
 def forum():
-    from datetime import datetime, date
-    from flask import request
-    
     # Filtreleme parametresi
     filter_type = request.args.get('filter', 'all')  # all, polls, events
     
@@ -67,10 +82,15 @@ def forum():
     
     # Anketleri ekle
     if filter_type in ['all', 'polls', 'forum']:
-        polls = Poll.query.filter_by(is_active=True).all()
+        polls = Poll.query.filter_by(is_active=True, deleted_at=None).all()
+        # Seçenek sayılarını anket başına ayrı sorgu yerine tek sorguda say
+        option_counts = dict(
+            db.session.query(PollOption.poll_id, db.func.count(PollOption.id))
+            .group_by(PollOption.poll_id)
+            .all()
+        )
         for poll in polls:
-            poll.option_count = poll.options.count()
-            poll.is_today = poll.created_at.date() == today
+            poll.option_count = option_counts.get(poll.id, 0)
             
             # Eğer seçenek yoksa, bu bir forum postudur
             item_type = 'forum' if poll.option_count == 0 else 'poll'
@@ -89,13 +109,8 @@ def forum():
     
     # Etkinlikleri ekle
     if filter_type in ['all', 'events']:
-        events = Event.query.filter_by(is_active=True).all()
+        events = Event.query.filter_by(is_active=True, deleted_at=None).all()
         for event in events:
-            # Kullanıcının bilet alıp almadığını kontrol et
-            if current_user.is_authenticated:
-                event.has_ticket = EventTicket.query.filter_by(event_id=event.id, user_id=current_user.id).first() is not None
-            else:
-                event.has_ticket = False
             all_items.append({
                 'type': 'event',
                 'item': event,
@@ -111,6 +126,22 @@ def forum():
     end = start + per_page
     paginated_items = all_items[start:end]
     
+    # Kullanıcının bilet/oy durumunu sadece bu sayfadaki öğeler için toplu çek
+    ticketed_event_ids, voted_poll_ids = set(), set()
+    if current_user.is_authenticated:
+        ticketed_event_ids, voted_poll_ids = resolve_viewer_state(
+            current_user,
+            event_ids=[entry['item'].id for entry in paginated_items if entry['type'] == 'event'],
+            poll_ids=[entry['item'].id for entry in paginated_items if entry['type'] != 'event']
+        )
+    for entry in paginated_items:
+        if entry['type'] == 'event':
+            entry['item'].has_ticket = entry['item'].id in ticketed_event_ids
+            # Bilet formu tekrar gönderilirse aynı bilet dönsün
+            entry['item'].idempotency_key = secrets.token_urlsafe(16)
+        else:
+            entry['item'].has_voted = entry['item'].id in voted_poll_ids
+    
     # Pagination bilgileri
     has_prev = page > 1
     has_next = end < total_items
@@ -126,9 +157,12 @@ def forum():
                          today=today)
 
 @main_bp.route('/poll/<int:poll_id>', methods=['GET', 'POST'])
+@limiter.limit('comment', 5, 60, key='user', methods=('POST',), when=lambda: 'comment' in request.form)
 @login_required
+@read_replica
 def poll_detail(poll_id):
-    poll = Poll.query.get_or_404(poll_id)
+    poll = Poll.query.options(joinedload(Poll.creator), joinedload(Poll.archive)).filter_by(id=poll_id, deleted_at=None).first_or_404()
+    archive = poll.archive
     
     # Oy verme formu
     vote_form = VoteForm()
@@ -138,6 +172,14 @@ def poll_detail(poll_id):
     comment_form = CommentForm()
     
     if request.method == 'POST':
+        if archive is not None:
+            flash('Bu anket arşivlendi, oy ve yorum kabul edilmiyor.', 'error')
+            return redirect(url_for('main.poll_detail', poll_id=poll_id))
+        if not poll.is_active:
+            # Kapanan anket arşivlenmeyi bekler; bu arada yazılan satırlar arşive girmezdi
+            flash('Bu anket kapandı, oy ve yorum kabul edilmiyor.', 'error')
+            return redirect(url_for('main.poll_detail', poll_id=poll_id))
+        
         if 'vote' in request.form and vote_form.validate_on_submit():
             # Kullanıcının tier kontrolü
             if current_user.tier < 1:
@@ -156,15 +198,17 @@ def poll_detail(poll_id):
                 user_id=current_user.id,
                 poll_id=poll_id,
                 poll_option_id=vote_form.poll_option.data,
-                weight=weight
+                weight=weight,
+                voter_tier=current_user.tier
             )
             
             db.session.add(vote)
             db.session.commit()
+            invalidate_viewer_state(poll_id=poll_id)
             
-            # XP kazandır
-            current_user.xp += 5
-            check_tier_upgrade(current_user)
+            # XP kazandır, analitik kovalarını güncelle (arka planda)
+            award_xp_later(current_user, 5)
+            enqueue('rollup_votes', unique=True)
             
             flash('Oyunuz başarıyla kaydedildi!', 'success')
             return redirect(url_for('main.poll_detail', poll_id=poll_id))
@@ -179,52 +223,72 @@ def poll_detail(poll_id):
             db.session.add(comment)
             db.session.commit()
             
-            # XP kazandır
-            current_user.xp += 2
-            check_tier_upgrade(current_user)
+            # XP kazandır (arka planda)
+            award_xp_later(current_user, 2)
             
             flash('Yorumunuz eklendi!', 'success')
             return redirect(url_for('main.poll_detail', poll_id=poll_id))
     
-    # Kullanıcının oy kullanıp kullanmadığını kontrol et
-    user_vote = Vote.query.filter_by(user_id=current_user.id, poll_id=poll_id).first()
-    has_voted = user_vote is not None
-    
-    # Oylama sonuçlarını hesapla
-    results = {}
-    for option in poll.options:
-        votes = option.votes.all()
-        total_weight = sum(vote.weight for vote in votes)
-        results[option.id] = {
-            'design': option.design,
-            'total_weight': total_weight,
-            'vote_count': len(votes)
-        }
-    
-    # Yorumları getir
-    comments = Comment.query.filter_by(poll_id=poll_id).order_by(Comment.timestamp.desc()).all()
+    options = poll.options.all()
+    if archive is not None:
+        # Arşivlenmiş anket: sonuçlar önceden hesaplanmış, yorumlar arşiv dosyasından
+        has_voted = False
+        results = archived_results(archive, options)
+        comments = archived_comments(archive)
+    else:
+        # Kullanıcının oy kullanıp kullanmadığını kontrol et
+        user_vote = Vote.query.filter_by(user_id=current_user.id, poll_id=poll_id).first()
+        has_voted = user_vote is not None
+        
+        # Oylama sonuçlarını hesapla
+        results = {}
+        for option in options:
+            votes = option.votes.all()
+            total_weight = sum(vote.weight for vote in votes)
+            results[option.id] = {
+                'design': option.design,
+                'total_weight': total_weight,
+                'vote_count': len(votes)
+            }
+        
+        # Yorumları getir
+        comments = Comment.query.options(joinedload(Comment.author)).filter_by(poll_id=poll_id).order_by(Comment.timestamp.desc()).all()
     
     # Seçenek sayısını kontrol et
-    option_count = poll.options.count()
+    option_count = len(options)
     is_forum_post = option_count == 0
-    
-    return render_template('poll_detail.html', 
+    total_votes = sum(result['vote_count'] for result in results.values())
+    
+    # Uzun yorum listelerinde sayfa akışlı gönderilir, ilk baytlar hemen ulaşır
+    render = render_template
+    if len(comments) > current_app.config['STREAM_COMMENTS_THRESHOLD']:
+        # Oturum ve DB session'ı akış başlamadan kapanır: şablon sadece yüklenmiş
+        # nesneleri kullanır, flash ve CSRF token'ı önceden hazırlanır
+        get_flashed_messages(with_categories=True)
+        generate_csrf()
+        render = stream_template
+    
+    return render('poll_detail.html', 
                          poll=poll, 
                          vote_form=vote_form, 
                          comment_form=comment_form,
                          has_voted=has_voted,
+                         archived=archive is not None,
+                         closed=not poll.is_active,
                          results=results,
                          comments=comments,
+                         options_by_id={option.id: option for option in options},
+                         option_count=option_count,
+                         total_votes=total_votes,
                          is_forum_post=is_forum_post)
 
 @main_bp.route('/profile', methods=['GET', 'POST'])
 @login_required
+@read_replica
 def profile():
-    from .forms import EditProfileForm
-    
     # Kullanıcı istatistiklerini hesapla
     current_user.design_count = current_user.designs.count()
-    current_user.vote_count = current_user.votes.count()
+    current_user.vote_count = current_user.votes.count() + current_user.archived_vote_count
     
     # Profil düzenleme formu
     form = EditProfileForm()
@@ -344,7 +408,7 @@ def add_designs_to_poll(poll_id):
     if current_user.tier < 3:
         abort(403)
     
-    poll = Poll.query.get_or_404(poll_id)
+    poll = Poll.query.filter_by(id=poll_id, deleted_at=None).first_or_404()
     
     # Sadece anket oluşturan kişi tasarım ekleyebilir
     if poll.created_by_user_id != current_user.id:
@@ -416,6 +480,7 @@ def register():
     return render_template('register.html', form=form)
 
 @auth_bp.route('/login', methods=['GET', 'POST'])
+@limiter.limit('login', 10, 60, key='ip', methods=('POST',))
 def login():
     if current_user.is_authenticated:
         return redirect(url_for('main.index'))
@@ -444,6 +509,7 @@ def logout():
 
 # QR kod route'ları
 @main_bp.route('/qr/<string:hash_id>')
+@limiter.limit('qr_scan', 20, 60, key='ip')
 def qr_scan(hash_id):
     qr = QRCode.query.filter_by(hash_id=hash_id).first()
     
@@ -463,6 +529,7 @@ def qr_scan(hash_id):
     return render_template('qr_confirm.html', qr=qr, requires_login=False)
 
 @main_bp.route('/qr/claim/<string:hash_id>', methods=['POST'])
+@limiter.limit('qr_claim', 10, 60, key='user')
 @login_required
 def qr_claim(hash_id):
     qr = QRCode.query.filter_by(hash_id=hash_id).first()
@@ -510,6 +577,7 @@ def create_event():
             location=form.location.data,
             event_date=form.event_date.data,
             ticket_xp_reward=form.ticket_xp_reward.data,
+            capacity=form.capacity.data,
             created_by_user_id=current_user.id
         )
         
@@ -521,35 +589,52 @@ def create_event():
     
     return render_template('create_event.html', form=form)
 
-@main_bp.route('/event/<int:event_id>/buy-ticket', methods=['POST'])
+@main_bp.route('/event/<int:event_id>/edit', methods=['GET', 'POST'])
 @login_required
-def buy_ticket(event_id):
-    event = Event.query.get_or_404(event_id)
+def edit_event(event_id):
+    # Admin kontrolü
+    if not current_user.is_admin:
+        abort(403)
     
-    # Kullanıcının zaten bilet alıp almadığını kontrol et
-    existing_ticket = EventTicket.query.filter_by(event_id=event_id, user_id=current_user.id).first()
-    if existing_ticket:
-        flash('Bu etkinlik için zaten bilet aldınız!', 'error')
+    event = Event.query.filter_by(id=event_id, deleted_at=None).first_or_404()
+    form = EventForm(obj=event)
+    form.submit.label.text = 'Kaydet'
+    if form.validate_on_submit():
+        if form.capacity.data and form.capacity.data < event.tickets_sold:
+            flash(f'Kontenjan satılan bilet sayısından ({event.tickets_sold}) az olamaz.', 'error')
+            return render_template('create_event.html', form=form, event=event)
+        
+        event.title = form.title.data
+        event.description = form.description.data
+        event.location = form.location.data
+        event.event_date = form.event_date.data
+        event.ticket_xp_reward = form.ticket_xp_reward.data
+        event.capacity = form.capacity.data
+        # updated_at ilerler; bilet sahipleri bildirim alır
+        db.session.commit()
+        
+        flash('Etkinlik güncellendi!', 'success')
         return redirect(url_for('main.forum'))
     
-    # Bilet numarası oluştur
-    import random
-    ticket_number = f"TKT-{event_id}-{current_user.id}-{random.randint(1000, 9999)}"
-    
-    # Bilet oluştur
-    ticket = EventTicket(
-        event_id=event_id,
-        user_id=current_user.id,
-        ticket_number=ticket_number
-    )
+    return render_template('create_event.html', form=form, event=event)
+
+@main_bp.route('/event/<int:event_id>/buy-ticket', methods=['POST'])
+@limiter.limit('buy_ticket', 10, 60, key='user')
+@login_required
+def buy_ticket(event_id):
+    event = Event.query.filter_by(id=event_id, deleted_at=None).first_or_404()
     
-    db.session.add(ticket)
+    # Bilet kes ve XP'yi tek transaction'da ver (tekrar denemelerde güvenli)
+    _, status = issue_ticket(current_user.id, event, request.form.get('idempotency_key'))
+    invalidate_viewer_state(event_id=event_id)
     
-    # XP kazandır
-    current_user.xp += event.ticket_xp_reward
+    if status == TICKET_EXISTS:
+        flash('Bu etkinlik için zaten bilet aldınız!', 'error')
+        return redirect(url_for('main.forum'))
     
-    db.session.add(current_user)
-    db.session.commit()
+    if status == TICKET_WAITLISTED:
+        flash('Biletler tükendi. Bekleme listesine eklendiniz.', 'info')
+        return redirect(url_for('main.forum'))
     
     # Tier atlama kontrolü
     check_tier_upgrade(current_user)
@@ -557,19 +642,54 @@ def buy_ticket(event_id):
     flash(f'Biletiniz kesildi! {event.ticket_xp_reward} XP kazandınız!', 'success')
     return redirect(url_for('main.forum'))
 
+# Anket analitiği (admin)
+@main_bp.route('/poll/<int:poll_id>/analytics')
+@login_required
+def poll_analytics_dashboard(poll_id):
+    if not current_user.is_admin:
+        abort(403)
+    
+    poll = Poll.query.filter_by(id=poll_id, deleted_at=None).first_or_404()
+    
+    # Özetlenmemiş oylar sorguda toplanır, özetleme worker'da çalışır
+    stats = poll_analytics(poll_id)
+    options = {option.id: option for option in poll.options}
+    
+    return render_template('poll_analytics.html', poll=poll, stats=stats, options=options)
+
+@main_bp.route('/poll/<int:poll_id>/analytics.csv')
+@login_required
+def poll_analytics_csv(poll_id):
+    if not current_user.is_admin:
+        abort(403)
+    
+    poll = Poll.query.filter_by(id=poll_id, deleted_at=None).first_or_404()
+    titles = {option.id: option.design.title for option in poll.options}
+    
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['saat', 'secenek_id', 'tasarim', 'tier', 'agirlik', 'oy_sayisi', 'puan'])
+    for hour, option_id, weight, count, weight_sum in hourly_rows(poll_id):
+        writer.writerow([hour.strftime('%Y-%m-%d %H:00'), option_id, titles.get(option_id, ''),
+                         tier_for_weight(weight), weight, count, weight_sum])
+    
+    return Response(buffer.getvalue(), mimetype='text/csv', headers={
+        'Content-Disposition': f'attachment; filename=anket-{poll_id}-oylar.csv'
+    })
+
 # Admin silme route'ları
 @main_bp.route('/poll/<int:poll_id>/delete', methods=['POST'])
 @login_required
 def delete_poll(poll_id):
-    poll = Poll.query.get_or_404(poll_id)
+    poll = Poll.query.filter_by(id=poll_id, deleted_at=None).first_or_404()
     
     # Admin kontrolü
     if not current_user.is_admin:
         abort(403)
     
-    # Anketi sil
-    db.session.delete(poll)
-    db.session.commit()
+    # Anketi hemen gizle, oylar/yorumlar/seçenekler arka planda silinsin
+    task = soft_delete(poll)
+    enqueue('purge', task_id=task.id)
     
     flash('Anket başarıyla silindi!', 'success')
     return redirect(url_for('main.forum'))
@@ -577,15 +697,92 @@ def delete_poll(poll_id):
 @main_bp.route('/event/<int:event_id>/delete', methods=['POST'])
 @login_required
 def delete_event(event_id):
-    event = Event.query.get_or_404(event_id)
+    event = Event.query.filter_by(id=event_id, deleted_at=None).first_or_404()
     
     # Admin kontrolü
     if not current_user.is_admin:
         abort(403)
     
-    # Etkinliği sil
-    db.session.delete(event)
-    db.session.commit()
+    # Etkinliği hemen gizle, biletler arka planda silinsin
+    task = soft_delete(event)
+    enqueue('purge', task_id=task.id)
     
     flash('Etkinlik başarıyla silindi!', 'success')
     return redirect(url_for('main.forum'))
+
+# Bildirimler
+@main_bp.route('/notifications')
+@login_required
+def notifications():
+    items = notification_feed(current_user.id)
+    # Sayfa görüldüğü an okunmuş sayılır; öğelerdeki unread değerleri önceki ziyarete göre
+    mark_seen(current_user.id)
+    return render_template('notifications.html', items=items)
+
+@main_bp.route('/notifications/unread-count')
+@login_required
+@read_replica
+def notification_count():
+    count = unread_count(current_user.id)
+    limit = current_app.config['NOTIFICATIONS_MAX_BADGE']
+    return jsonify(count=count, label=f'{limit}+' if count > limit else str(count))
+
+# Rate limit istatistikleri
+@main_bp.route('/admin/rate-limits')
+@login_required
+def rate_limit_stats():
+    if not current_user.is_admin:
+        abort(403)
+    
+    return jsonify(limiter.stats())
+
+# Arka plan işi istatistikleri
+@main_bp.route('/admin/jobs')
+@login_required
+def job_queue_stats():
+    if not current_user.is_admin:
+        abort(403)
+    
+    return jsonify(job_stats())
+
+# Yüklenen dosyalar UPLOAD_FOLDER'dan sunulur (sunucular arası paylaşılan klasör olabilir)
+@main_bp.route('/uploads/<path:filename>')
+def uploaded_file(filename):
+    return send_from_directory(current_app.config['UPLOAD_FOLDER'], filename)
+
+# Sağlık kontrolleri (load balancer / orkestratör için)
+@main_bp.route('/healthz')
+def healthz():
+    """Süreç ayakta mı (veritabanına dokunmaz)"""
+    return jsonify(status='ok')
+
+@main_bp.route('/readyz')
+def readyz():
+    """İstek almaya hazır mı: veritabanları, oturum deposu ve yükleme klasörü"""
+    checks = {}
+    
+    def check(name, probe):
+        try:
+            probe()
+            checks[name] = 'ok'
+        except Exception as exc:
+            current_app.logger.warning('Hazırlık kontrolü başarısız (%s): %s', name, exc)
+            checks[name] = f'hata: {exc.__class__.__name__}'
+    
+    for key, engine in db.engines.items():
+        def ping(engine=engine):
+            with engine.connect() as conn:
+                conn.execute(text('SELECT 1'))
+        check(key or 'database', ping)
+    
+    store = getattr(current_app.session_interface, 'store', None)
+    if store is not None:
+        check('sessions', store.ping)
+    
+    def uploads_writable():
+        if not os.access(current_app.config['UPLOAD_FOLDER'], os.W_OK):
+            raise PermissionError(current_app.config['UPLOAD_FOLDER'])
+    check('uploads', uploads_writable)
+    
+    ready = all(value == 'ok' for value in checks.values())
+    return jsonify(status='ok' if ready else 'hata', checks=checks), 200 if ready else 503
@@ -0,0 +1,115 @@
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func, inspect, select, text, update
+from sqlalchemy.schema import CreateTable
+from . import db
+from .models import PollArchive, RollupCursor, Vote
+from .tiers import tier_rules
+
+def _backfill_voter_tier(conn):
+    # Oy anındaki tier bilinmiyor: kayıtlı ağırlık bugünkü kurallarla tier'a çevrilir
+    conn.execute(update(Vote).values(voter_tier=tier_rules.weight_tier_case(Vote.weight)))
+
+# Mevcut tablolara sonradan eklenen sütunlar. db.create_all() yeni tabloları
+# oluşturur ama var olan tablolara sütun/indeks eklemez; eski bir veritabanı
+# bu listeyle yükseltilir. Yeni sütunlar listenin sonuna eklenir.
+# (tablo, sütun, SQLite tanımı, sütun eklendiğinde çalışacak doldurma)
+COLUMNS = [
+    ('event', 'capacity', 'INTEGER', None),
+    ('event', 'tickets_sold', 'INTEGER NOT NULL DEFAULT 0',
+     'UPDATE event SET tickets_sold = (SELECT COUNT(*) FROM event_ticket WHERE event_ticket.event_id = event.id)'),
+    ('poll', 'updated_at', 'DATETIME', 'UPDATE poll SET updated_at = created_at'),
+    ('event', 'updated_at', 'DATETIME', 'UPDATE event SET updated_at = created_at'),
+    ('poll', 'deleted_at', 'DATETIME', None),
+    ('event', 'deleted_at', 'DATETIME', None),
+    ('user', 'archived_vote_count', 'INTEGER NOT NULL DEFAULT 0', None),
+    ('vote', 'voter_tier', 'INTEGER', _backfill_voter_tier),
+]
+
+def _vote_id_floor(conn):
+    # Rollup cursor'ı ve arşiv bu id'lere kadar işledi; yeni oylar üstünden başlar
+    return max(conn.execute(select(func.max(RollupCursor.last_id))).scalar() or 0,
+               conn.execute(select(func.max(PollArchive.last_vote_id))).scalar() or 0)
+
+# SQLite'ta AUTOINCREMENT ile yeniden oluşturulacak tablolar ve yeni id'lerin
+# inemeyeceği alt sınır. AUTOINCREMENT sonradan ALTER TABLE ile eklenemez:
+# tablo kopyalanır, eskisi silinir, indeksler aşağıda yeniden oluşturulur.
+AUTOINCREMENT_TABLES = [
+    (Vote.__table__, _vote_id_floor),
+]
+
+def _rebuild_with_autoincrement(conn, table, floor):
+    name, temp = table.name, f'{table.name}_autoincrement'
+    quote = conn.dialect.identifier_preparer.quote
+    create = str(CreateTable(table).compile(dialect=conn.dialect))
+    columns = ', '.join(quote(column.name) for column in table.columns)
+    conn.execute(text(f'DROP TABLE IF EXISTS {quote(temp)}'))
+    conn.execute(text(create.replace(f'CREATE TABLE {quote(name)} ', f'CREATE TABLE {quote(temp)} ', 1)))
+    conn.execute(text(f'INSERT INTO {quote(temp)} ({columns}) SELECT {columns} FROM {quote(name)}'))
+    conn.execute(text(f'DROP TABLE {quote(name)}'))
+    conn.execute(text(f'ALTER TABLE {quote(temp)} RENAME TO {quote(name)}'))
+    # Kopyalanan en büyük id sqlite_sequence'e yazıldı; silinmiş daha büyük
+    # id'ler de tekrar verilmesin diye alt sınıra çekilir
+    seq = conn.execute(text('SELECT seq FROM sqlite_sequence WHERE name = :name'), {'name': name}).scalar()
+    if seq is None:
+        conn.execute(text('INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)'), {'name': name, 'seq': floor})
+    elif seq < floor:
+        conn.execute(text('UPDATE sqlite_sequence SET seq = :seq WHERE name = :name'), {'name': name, 'seq': floor})
+
+def upgrade_schema(echo=None):
+    """Veritabanını modellere göre yükselt (tekrar çalıştırmak güvenlidir).
+
+    Eksik tablolar oluşturulur, eksik sütunlar ALTER TABLE ile eklenip
+    doldurulur, AUTOINCREMENT'e geçen tablolar yeniden oluşturulur, eksik
+    indeksler oluşturulur. Hepsi tek transaction'dadır.
+    Yapılan değişikliklerin listesini döndürür.
+    """
+    db.create_all()
+    changes = []
+    with db.engine.begin() as conn:
+        inspector = inspect(conn)
+        quote = conn.dialect.identifier_preparer.quote
+        existing = {}
+        for table, column, ddl, backfill in COLUMNS:
+            if table not in existing:
+                existing[table] = {col['name'] for col in inspector.get_columns(table)}
+            if column in existing[table]:
+                continue
+            conn.execute(text(f'ALTER TABLE {quote(table)} ADD COLUMN {quote(column)} {ddl}'))
+            if callable(backfill):
+                backfill(conn)
+            elif backfill:
+                conn.execute(text(backfill))
+            existing[table].add(column)
+            changes.append(f'{table}.{column} eklendi')
+
+        if conn.dialect.name == 'sqlite':
+            for table, floor in AUTOINCREMENT_TABLES:
+                sql = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                                   {'name': table.name}).scalar()
+                if 'AUTOINCREMENT' not in sql.upper():
+                    _rebuild_with_autoincrement(conn, table, floor(conn))
+                    changes.append(f'{table.name} tablosu AUTOINCREMENT ile yeniden oluşturuldu')
+            inspector = inspect(conn)  # Yeniden oluşturulan tabloların indeksleri silindi
+
+        for table in db.metadata.sorted_tables:
+            names = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in names:
+                    index.create(conn)
+                    changes.append(f'{index.name} indeksi oluşturuldu')
+
+    if echo:
+        for change in changes:
+            echo(change)
+    return changes
+
+@click.command('upgrade-db')
+@with_appcontext
+def upgrade_db_command():
+    """Eski veritabanına yeni tabloları, sütunları ve indeksleri ekle"""
+    changes = upgrade_schema(echo=click.echo)
+    click.echo(f'{len(changes)} değişiklik uygulandı.' if changes else 'Veritabanı güncel.')
+
+def init_app(app):
+    app.cli.add_command(upgrade_db_command)
@@ -0,0 +1,204 @@
+import secrets
+import random
+from datetime import datetime
+from functools import wraps
+from flask import has_app_context
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSession, SessionInterface
+from sqlalchemy import delete, insert, select
+from . import db
+from .models import ServerSession
+
+# Sunucu taraflı oturumlar
+#
+# Cookie'de sadece rastgele bir oturum kimliği durur, içerik paylaşılan bir
+# depoda tutulur. Böylece istek hangi sunucuya düşerse düşsün aynı oturumu
+# görür ve oturum büyüklüğü cookie sınırına takılmaz.
+# SESSION_STORAGE_URL: sql (varsayılan, birincil veritabanı), redis://...
+# veya cookie (Flask'ın imzalı cookie oturumu).
+
+class SqlSessionStore:
+    """Oturumları birincil veritabanındaki server_session tablosunda tutar"""
+
+    cleanup_probability = 0.01  # Kayıtların ~%1'inde süresi dolanlar silinir
+
+    def __init__(self, db):
+        self.db = db
+        self.table = ServerSession.__table__
+
+    def load(self, sid):
+        # ORM session'ından bağımsız kısa bağlantı: view'ın işlemine ve
+        # replika yönlendirmesine karışmaz
+        with self.db.engine.connect() as conn:
+            row = conn.execute(
+                select(self.table.c.data).where(self.table.c.id == sid, self.table.c.expires_at > datetime.utcnow())
+            ).first()
+        return row[0] if row else None
+
+    def save(self, sid, data, expires_at):
+        with self.db.engine.begin() as conn:
+            conn.execute(delete(self.table).where(self.table.c.id == sid))
+            conn.execute(insert(self.table).values(id=sid, data=data, expires_at=expires_at))
+            if random.random() < self.cleanup_probability:
+                conn.execute(delete(self.table).where(self.table.c.expires_at <= datetime.utcnow()))
+
+    def delete(self, sid):
+        with self.db.engine.begin() as conn:
+            conn.execute(delete(self.table).where(self.table.c.id == sid))
+
+    def ping(self):
+        with self.db.engine.connect() as conn:
+            conn.execute(select(self.table.c.id).limit(1))
+
+class RedisSessionStore:
+    """Oturumları Redis'te süre sonu (TTL) ile tutar"""
+
+    prefix = 'session:'
+
+    def __init__(self, url):
+        import redis
+        self._client = redis.Redis.from_url(url)
+
+    def load(self, sid):
+        value = self._client.get(self.prefix + sid)
+        return value.decode('utf-8') if value else None
+
+    def save(self, sid, data, expires_at):
+        ttl = max(int((expires_at - datetime.utcnow()).total_seconds()), 1)
+        self._client.setex(self.prefix + sid, ttl, data)
+
+    def delete(self, sid):
+        self._client.delete(self.prefix + sid)
+
+    def ping(self):
+        self._client.ping()
+
+def create_store(url):
+    """SESSION_STORAGE_URL değerine göre oturum deposu oluştur"""
+    if not url or url == 'sql':
+        return SqlSessionStore(db)
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisSessionStore(url)
+    raise ValueError(f'Desteklenmeyen oturum deposu: {url}')
+
+class ServerSideSession(SecureCookieSession):
+    """Depodan ilk erişimde yüklenen oturum.
+
+    Oturuma hiç dokunmayan istekler (statik dosyalar, sağlık kontrolleri,
+    IP anahtarlı rate limit redleri) depoya sorgu atmaz.
+    """
+
+    # Aynı istek içinde yazılıp silinen, hiç kaydedilmeyen anahtarlar.
+    # Flask-Login her after_request'te '_remember'a bakar; yüklenmemiş
+    # oturumda bunun cevabı depoya gitmeden "yok"tur.
+    transient_keys = frozenset({'_remember'})
+
+    def __init__(self, interface=None, app=None, sid=None):
+        super().__init__()
+        self.interface = interface
+        self.app = app
+        self.sid = sid
+        self.new = sid is None
+        self.loaded = self.new
+        self.loaded_user_id = None
+
+    def _load(self):
+        if self.loaded:
+            return
+        self.loaded = True
+        data = self.interface.load_data(self.app, self.sid)
+        if data is None:
+            # Süresi dolmuş veya bozuk: boş oturum, kaydedilirse yeni id alır
+            self.sid, self.new = None, True
+            return
+        dict.update(self, data)  # Yükleme `modified` sayılmaz
+        self.loaded_user_id = data.get('_user_id')
+
+    def __contains__(self, key):
+        if not self.loaded and key in self.transient_keys:
+            return False
+        self._load()
+        return super().__contains__(key)
+
+def _loading(method):
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self._load()
+        return method(self, *args, **kwargs)
+    return wrapper
+
+# Sözlüğü okuyan/değiştiren her metot önce kaydı yükler
+for _name in ('__getitem__', '__setitem__', '__delitem__', '__iter__', '__len__',
+              '__eq__', '__repr__', 'get', 'setdefault', 'pop', 'popitem', 'update', 'clear',
+              'keys', 'values', 'items', 'copy'):
+    setattr(ServerSideSession, _name, _loading(getattr(SecureCookieSession, _name)))
+ServerSideSession.__hash__ = None
+
+def _new_sid():
+    return secrets.token_urlsafe(32)
+
+class ServerSideSessionInterface(SessionInterface):
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, store):
+        self.store = store
+
+    def load_data(self, app, sid):
+        if not has_app_context():
+            # Test istemcisinin session_transaction'ı oturumu bağlam dışında kullanır
+            with app.app_context():
+                return self.load_data(app, sid)
+        data = self.store.load(sid)
+        if data is None:
+            return None
+        try:
+            return self.serializer.loads(data)
+        except ValueError:
+            return None
+
+    def open_session(self, app, request):
+        # Kayıt burada okunmaz, oturuma ilk erişimde yüklenir
+        return ServerSideSession(self, app, request.cookies.get(self.get_cookie_name(app)) or None)
+
+    def save_session(self, app, session, response):
+        if not session.loaded:
+            return  # Oturuma dokunulmadı: ne kayıt ne cookie değişir
+
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        # Boşaltılan oturumun kaydı ve cookie'si silinir
+        if not session:
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path, secure=secure,
+                                       samesite=samesite, httponly=httponly)
+            return
+
+        if not self.should_set_cookie(app, session):
+            return
+
+        if session.new:
+            session.sid = _new_sid()
+        elif session.get('_user_id') != session.loaded_user_id:
+            # Giriş/çıkışta oturum kimliği yenilenir (session fixation)
+            self.store.delete(session.sid)
+            session.sid = _new_sid()
+
+        self.store.save(session.sid, self.serializer.dumps(dict(session)),
+                        datetime.utcnow() + app.permanent_session_lifetime)
+        response.set_cookie(name, session.sid, expires=self.get_expiration_time(app, session),
+                            httponly=httponly, domain=domain, path=path, secure=secure, samesite=samesite)
+
+def init_app(app):
+    app.config.setdefault('SESSION_STORAGE_URL', 'sql')
+    url = app.config['SESSION_STORAGE_URL']
+    if url != 'cookie':
+        app.session_interface = ServerSideSessionInterface(create_store(url))
@@ -0,0 +1,37 @@
+from flask import current_app
+from sqlalchemy import update
+from . import db
+from .models import User
+from .jobs import job
+from .tiers import tier_rules
+from .analytics import rollup_votes
+from .purge import run_purge_task
+
+@job('award_xp')
+def award_xp(user_id, amount):
+    """Kullanıcıya XP ekle ve gerekiyorsa tier'ını yükselt.
+
+    İki işlem de atomik UPDATE olduğu için aynı kullanıcıya ait işler
+    paralel çalışsa bile XP kaybolmaz.
+    """
+    db.session.execute(update(User).where(User.id == user_id).values(xp=User.xp + amount))
+    # Tier 0 hesaplar sadece QR ile aktifleşir, tier asla düşürülmez
+    new_tier = tier_rules.tier_case(User.xp)
+    db.session.execute(
+        update(User)
+        .where(User.id == user_id, User.tier >= 1, User.tier < new_tier)
+        .values(tier=new_tier)
+    )
+    db.session.commit()
+
+# Oy isteğinin içinde çalışmaz; analitik sayfaları özetlenmemiş oyları
+# okurken ayrıca toplar (bkz. analytics.poll_analytics)
+@job('rollup_votes', eager=False)
+def rollup_votes_job():
+    """Yeni oyları saatlik analitik kovalarına işle"""
+    rollup_votes()
+
+@job('purge', max_attempts=10)
+def purge_job(task_id):
+    """Soft-delete edilmiş içeriğin bağımlı kayıtlarını sil (kaldığı aşamadan)"""
+    run_purge_task(task_id, current_app.config['PURGE_BATCH_SIZE'], pause=0.01)
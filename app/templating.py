@@ -0,0 +1,78 @@
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+from flask import render_template
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup
+
+# Türkçe ay isimleri (şablonlarda her kartta yeniden oluşturulmasın diye burada)
+MONTH_NAMES = ('', 'Ocak', 'Şubat', 'Mart', 'Nisan', 'Mayıs', 'Haziran',
+               'Temmuz', 'Ağustos', 'Eylül', 'Ekim', 'Kasım', 'Aralık')
+
+def tr_date(value, style='short'):
+    """Tarihi Türkçe biçimlendir.
+
+    short:   bugünse '14:05', değilse '3 Mart'
+    long:    '3 Mart 2025, 14:05'
+    numeric: '03.03.2025 14:05'
+    """
+    if value is None:
+        return ''
+    if style == 'numeric':
+        return f'{value.day:02d}.{value.month:02d}.{value.year} {value.hour:02d}:{value.minute:02d}'
+    if style == 'long':
+        return f'{value.day} {MONTH_NAMES[value.month]} {value.year}, {value.hour:02d}:{value.minute:02d}'
+    if value.date() == date.today():
+        return f'{value.hour:02d}:{value.minute:02d}'
+    return f'{value.day} {MONTH_NAMES[value.month]}'
+
+class FragmentCache:
+    """Render edilmiş şablon parçaları için LRU önbellek.
+
+    Anahtar, parçanın içeriğini belirleyen her şeyi içermelidir (öğe id,
+    updated_at/timestamp ve görüntüleyene göre değişen bayraklar). SQLite
+    silinen satırların id'lerini yeniden kullanabildiği için id tek başına
+    yetmez. Eski anahtarlar kendiliğinden düşer, ayrıca silme gerekmez.
+    """
+
+    def __init__(self, maxsize=2000):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def render(self, template_name, key, **context):
+        cache_key = (template_name,) + tuple(key)
+        with self._lock:
+            html = self._items.get(cache_key)
+            if html is not None:
+                self._items.move_to_end(cache_key)
+                return html
+
+        html = Markup(render_template(template_name, **context))
+        with self._lock:
+            self._items[cache_key] = html
+            if len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return html
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+fragment_cache = FragmentCache()
+
+def init_app(app):
+    """Filtreleri, parça önbelleğini ve bytecode önbelleğini kaydet"""
+    app.config.setdefault('FRAGMENT_CACHE_SIZE', 2000)
+    app.config.setdefault('TEMPLATE_BYTECODE_CACHE_DIR', os.path.join(app.instance_path, 'jinja_cache'))
+
+    app.add_template_filter(tr_date)
+    app.add_template_global(fragment_cache.render, 'cached_fragment')
+    fragment_cache.maxsize = app.config['FRAGMENT_CACHE_SIZE']
+
+    # Derlenmiş şablonlar diskte saklanır, yeni süreçler yeniden derlemez
+    cache_dir = app.config['TEMPLATE_BYTECODE_CACHE_DIR']
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
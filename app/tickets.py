@@ -0,0 +1,103 @@
+import hashlib
+import secrets
+from sqlalchemy import update
+from sqlalchemy.dialects import sqlite
+from . import db
+from .models import User, Event, EventTicket, EventWaitlist
+
+# issue_ticket sonuçları
+TICKET_CREATED = 'created'    # Yeni bilet kesildi, XP verildi
+TICKET_REPLAYED = 'replayed'  # Aynı idempotency key ile tekrar gelen istek
+TICKET_EXISTS = 'exists'      # Kullanıcının bu etkinlikte zaten bileti var
+TICKET_WAITLISTED = 'waitlisted'  # Kontenjan dolu, bekleme listesine alındı
+
+def ticket_number_for(event_id, user_id, idempotency_key=None):
+    """Bilet numarası üret.
+
+    (etkinlik, kullanıcı) ikilisi zaten benzersiz olduğu için numara da
+    çakışmasızdır; sondaki ek tahmin edilemesin diye rastgele, idempotency
+    key verildiyse ondan türetilir.
+    """
+    if idempotency_key:
+        suffix = hashlib.sha256(idempotency_key.encode()).hexdigest()[:8]
+    else:
+        suffix = secrets.token_hex(4)
+    return f"TKT-{event_id}-{user_id}-{suffix.upper()}"
+
+def _insert_ignore(model, values, index_elements):
+    """Benzersizlik çakışmasında sessizce geçen INSERT ifadesi"""
+    dialect = sqlite
+    if db.engine.dialect.name == 'postgresql':
+        # PostgreSQL dialect'i ~50ms'de yüklenir; sadece gerektiğinde import et
+        from sqlalchemy.dialects import postgresql as dialect
+    return dialect.insert(model).values(**values).on_conflict_do_nothing(
+        index_elements=index_elements
+    )
+
+def _reserve_seat(event_id):
+    """Kontenjan varsa satılan bilet sayacını atomik olarak bir artır.
+
+    Koşullu UPDATE, yazma kilidi altında çalıştığı için aynı anda gelen
+    istekler kontenjanı aşamaz. Yer ayrıldıysa True döner. updated_at
+    sabit tutulur: bilet satışı etkinliğin güncellenmesi sayılmaz.
+    """
+    result = db.session.execute(
+        update(Event)
+        .where(Event.id == event_id)
+        .where((Event.capacity.is_(None)) | (Event.tickets_sold < Event.capacity))
+        .values(tickets_sold=Event.tickets_sold + 1, updated_at=Event.updated_at)
+    )
+    return result.rowcount == 1
+
+def _join_waitlist(user_id, event_id):
+    db.session.execute(_insert_ignore(
+        EventWaitlist,
+        {'event_id': event_id, 'user_id': user_id},
+        ['user_id', 'event_id']
+    ))
+    db.session.commit()
+    return None, TICKET_WAITLISTED
+
+def issue_ticket(user_id, event, idempotency_key=None):
+    """Kullanıcıya etkinlik bileti kes ve XP'yi aynı transaction içinde ver.
+
+    Çift tıklama veya tekrar denemelerde IntegrityError oluşmaz: bilet
+    (user_id, event_id) üzerinde insert-or-ignore ile eklenir, yer ayırma
+    ve XP yalnızca satır gerçekten eklendiyse yapılır. Kontenjan doluysa
+    kullanıcı bekleme listesine alınır. Dönüş değeri: (bilet, sonuç)
+    """
+    # Tükendiği bilinen etkinlikte bilet tablosuna hiç yazmadan bekleme listesine al
+    if event.is_sold_out:
+        existing = EventTicket.query.filter_by(event_id=event.id, user_id=user_id).first()
+        if existing is None:
+            return _join_waitlist(user_id, event.id)
+
+    ticket_number = ticket_number_for(event.id, user_id, idempotency_key)
+
+    result = db.session.execute(_insert_ignore(
+        EventTicket,
+        {'event_id': event.id, 'user_id': user_id, 'ticket_number': ticket_number},
+        ['user_id', 'event_id']
+    ))
+
+    status = None
+    if result.rowcount == 1:
+        if not _reserve_seat(event.id):
+            # Bu arada kontenjan doldu, eklenen bileti geri al
+            db.session.rollback()
+            return _join_waitlist(user_id, event.id)
+
+        db.session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(xp=User.xp + event.ticket_xp_reward)
+        )
+        status = TICKET_CREATED
+
+    db.session.commit()
+
+    ticket = EventTicket.query.filter_by(event_id=event.id, user_id=user_id).one()
+    if status is None:
+        # Mevcut bilet bu isteğin önceki denemesinde mi kesildi?
+        status = TICKET_REPLAYED if ticket.ticket_number == ticket_number and idempotency_key else TICKET_EXISTS
+    return ticket, status
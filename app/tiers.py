@@ -0,0 +1,170 @@
+import json
+import os
+import time
+from bisect import bisect_right
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import case, update
+from . import db
+from .models import User, Vote
+
+# Varsayılan tier kuralları; app.config['TIER_RULES'] veya
+# instance/tier_rules.json ile değiştirilebilir. Tier 0 (aktif olmayan
+# hesap) kurallarda yer almaz, sadece QR ile Tier 1'e geçilir.
+DEFAULT_TIER_RULES = [
+    {'tier': 1, 'min_xp': 0, 'vote_weight': 1},
+    {'tier': 2, 'min_xp': 100, 'vote_weight': 3},
+    {'tier': 3, 'min_xp': 500, 'vote_weight': 5},
+]
+
+class TierRules:
+    """Tier kurallarının dizi tabanlı, önceden derlenmiş hali.
+
+    Eşikler sıralı bir listede tutulur ve XP'den tier bulma bisect ile
+    yapılır; oy ağırlığı tier numarasıyla indekslenen bir listeden okunur.
+    """
+
+    def __init__(self, rules=None):
+        self.load(rules or DEFAULT_TIER_RULES)
+
+    def load(self, rules):
+        ordered = sorted(rules, key=lambda rule: rule['tier'])
+        if not ordered or ordered[0]['tier'] < 1:
+            raise ValueError('Tier kuralları Tier 1 ve üstü için tanımlanmalı.')
+        thresholds = [int(rule['min_xp']) for rule in ordered]
+        if thresholds != sorted(thresholds):
+            raise ValueError('Tier XP eşikleri tier sırasıyla artmalı.')
+
+        self.rules = ordered
+        self._thresholds = thresholds
+        self._tiers = [rule['tier'] for rule in ordered]
+        # Tier 0 oy kullanamaz. Kurallardan çıkarılmış ara tier'lar (o tier'da
+        # verilmiş eski oylar) bir alttaki tanımlı tier'ın ağırlığını alır
+        weights = {rule['tier']: int(rule['vote_weight']) for rule in ordered}
+        self._weights = [0]
+        for tier in range(1, self._tiers[-1] + 1):
+            self._weights.append(weights.get(tier, self._weights[-1]))
+        self._tier_by_weight = {}
+        for rule in ordered:
+            self._tier_by_weight.setdefault(int(rule['vote_weight']), rule['tier'])
+
+    @property
+    def max_tier(self):
+        return self._tiers[-1]
+
+    def vote_weight(self, tier):
+        """Tier'a göre oy ağırlığı; en üst tier'ı aşanlar onun ağırlığını alır"""
+        if 0 <= tier < len(self._weights):
+            return self._weights[tier]
+        return self._weights[-1] if tier > 0 else 0
+
+    def tier_for_xp(self, xp):
+        """Aktif bir hesabın XP'sine karşılık gelen tier"""
+        index = bisect_right(self._thresholds, xp or 0) - 1
+        return self._tiers[max(index, 0)]
+
+    def tier_for_weight(self, weight):
+        """Kayıtlı oy ağırlığından tier (analitik etiketleri için)"""
+        return self._tier_by_weight.get(weight)
+
+    def tier_case(self, xp_column):
+        """XP sütunundan tier hesaplayan SQL CASE ifadesi"""
+        return case(
+            *[(xp_column >= threshold, tier) for threshold, tier in
+              reversed(list(zip(self._thresholds, self._tiers)))],
+            else_=self._tiers[0]
+        )
+
+    def weight_case(self, tier_column):
+        """Tier sütunundan oy ağırlığı hesaplayan SQL CASE ifadesi (vote_weight ile aynı kural)"""
+        return case(
+            {tier: weight for tier, weight in enumerate(self._weights)},
+            value=tier_column,
+            else_=case((tier_column > self.max_tier, self._weights[-1]), else_=0)
+        )
+
+    def weight_tier_case(self, weight_column):
+        """Kayıtlı oy ağırlığından tier hesaplayan SQL CASE ifadesi"""
+        return case(self._tier_by_weight, value=weight_column, else_=None)
+
+tier_rules = TierRules()
+
+def load_tier_rules(app):
+    """Kuralları config'den, varsa instance/tier_rules.json'dan yükle"""
+    rules = app.config['TIER_RULES']
+    path = app.config['TIER_RULES_FILE']
+    if path and os.path.exists(path):
+        with open(path, encoding='utf-8') as handle:
+            rules = json.load(handle)
+    tier_rules.load(rules)
+    return tier_rules
+
+def _batches(query_max_id, batch_size):
+    start = 0
+    while start < query_max_id:
+        end = min(start + batch_size, query_max_id)
+        yield start, end
+        start = end
+
+def recompute_tiers(batch_size=20000, reweight_votes=True, echo=print):
+    """Tüm kullanıcıların tier'ını ve geçmiş oyların ağırlığını yeniden hesapla.
+
+    Güncellemeler id aralıklarıyla, küme tabanlı UPDATE'lerle ve her parti
+    ayrı commit edilerek yapılır. Oylar, oy verildiği andaki tier'ın
+    (Vote.voter_tier) yeni kurallardaki ağırlığına göre güncellenir; oy
+    verenin sonradan kazandığı tier geçmiş oyları değiştirmez. voter_tier'ı
+    olmayan oylara dokunulmaz. Tier 0 (aktif olmayan) hesaplara dokunulmaz.
+    """
+    from .analytics import rebuild_rollups  # analytics bu modülü import ediyor
+
+    def run(label, model, statement):
+        max_id = db.session.query(db.func.max(model.id)).scalar() or 0
+        started = time.perf_counter()
+        changed = 0
+        for start, end in _batches(max_id, batch_size):
+            result = db.session.execute(statement.where(model.id > start, model.id <= end))
+            db.session.commit()
+            changed += result.rowcount
+            elapsed = time.perf_counter() - started
+            echo(f'{label}: {end}/{max_id} ({end / max_id:.0%}), {changed} satır, '
+                 f'{end / elapsed if elapsed else 0:.0f} satır/s')
+        return changed
+
+    users = run('Kullanıcılar', User, (
+        update(User)
+        .where(User.tier >= 1)
+        .where(User.tier != tier_rules.tier_case(User.xp))
+        .values(tier=tier_rules.tier_case(User.xp))
+    ))
+
+    votes = 0
+    if reweight_votes:
+        votes = run('Oylar', Vote, (
+            update(Vote)
+            .where(Vote.voter_tier.is_not(None))
+            .where(Vote.weight != tier_rules.weight_case(Vote.voter_tier))
+            .values(weight=tier_rules.weight_case(Vote.voter_tier))
+        ))
+        if votes:
+            echo('Analitik kovaları yeniden hesaplanıyor...')
+            rebuild_rollups()
+
+    return users, votes
+
+@click.command('recompute-tiers')
+@click.option('--batch-size', default=20000, show_default=True)
+@click.option('--skip-votes', is_flag=True, help='Geçmiş oyların ağırlığına dokunma')
+@with_appcontext
+def recompute_tiers_command(batch_size, skip_votes):
+    """Tier kurallarını yeniden yükle, kullanıcıları ve oyları güncelle"""
+    load_tier_rules(current_app)
+    users, votes = recompute_tiers(batch_size, reweight_votes=not skip_votes, echo=click.echo)
+    click.echo(f'{users} kullanıcının tier\'ı, {votes} oyun ağırlığı güncellendi.')
+
+def init_app(app):
+    app.config.setdefault('TIER_RULES', DEFAULT_TIER_RULES)
+    app.config.setdefault('TIER_RULES_FILE', os.path.join(app.instance_path, 'tier_rules.json'))
+
+    load_tier_rules(app)
+    app.cli.add_command(recompute_tiers_command)
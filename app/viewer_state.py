@@ -0,0 +1,87 @@
+from flask import session
+from . import db
+from .models import EventTicket, Vote
+
+# Oturumda saklanan kullanıcıya özel durum önbelleği
+#
+# Bilinen sınırlama: önbellek sadece bu oturumda yapılan oy/bilet işlemlerinde
+# temizlenir. Kullanıcı başka bir cihazdan/oturumdan oy verirse veya bilet
+# alırsa bu oturum, kayıt önbellekten düşene kadar eski durumu gösterir.
+SESSION_KEY = 'viewer_state'
+# İki tür için toplam üst sınır: oturum cookie'de tutulduğunda
+# (SESSION_STORAGE_URL=cookie) imzalı cookie 4 KB tarayıcı sınırının altında kalmalı
+MAX_CACHED_ITEMS = 150
+
+def _load_state(user_id):
+    """Oturumdaki önbelleği getir, kullanıcı değiştiyse sıfırla"""
+    state = session.get(SESSION_KEY)
+    if not state or state.get('user_id') != user_id:
+        state = {'user_id': user_id, 'events': {}, 'polls': {}}
+    return state
+
+def _missing(cache, ids):
+    return [item_id for item_id in ids if str(item_id) not in cache]
+
+def _fill(cache, missing, query):
+    """Önbellekte olmayan id'leri tek sorguyla doldur"""
+    if not missing:
+        return False
+
+    found = {row[0] for row in query(missing)}
+    for item_id in missing:
+        cache[str(item_id)] = item_id in found
+    return True
+
+def resolve_viewer_state(user, event_ids=(), poll_ids=()):
+    """Kullanıcının verilen etkinliklerde bileti, anketlerde oyu olup olmadığını döndür.
+
+    Sayfa başına tür başına en fazla bir sorgu atılır, sonuç oturumda saklanır.
+    Dönüş değeri: (bilet alınan etkinlik id'leri, oy verilen anket id'leri)
+    """
+    state = _load_state(user.id)
+
+    missing_events = _missing(state['events'], event_ids)
+    missing_polls = _missing(state['polls'], poll_ids)
+    cached = len(state['events']) + len(state['polls'])
+    if cached + len(missing_events) + len(missing_polls) > MAX_CACHED_ITEMS:
+        state['events'].clear()
+        state['polls'].clear()
+        missing_events, missing_polls = list(event_ids), list(poll_ids)
+
+    changed = _fill(
+        state['events'], missing_events,
+        lambda ids: db.session.query(EventTicket.event_id).filter(
+            EventTicket.user_id == user.id,
+            EventTicket.event_id.in_(ids)
+        )
+    )
+    changed = _fill(
+        state['polls'], missing_polls,
+        lambda ids: db.session.query(Vote.poll_id).filter(
+            Vote.user_id == user.id,
+            Vote.poll_id.in_(ids)
+        )
+    ) or changed
+
+    if changed:
+        session[SESSION_KEY] = state
+
+    ticketed = {item_id for item_id in event_ids if state['events'][str(item_id)]}
+    voted = {item_id for item_id in poll_ids if state['polls'][str(item_id)]}
+    return ticketed, voted
+
+def invalidate_viewer_state(event_id=None, poll_id=None):
+    """Bilet alma/oy verme sonrası ilgili önbellek kaydını sil (parametresiz çağrılırsa tümünü)"""
+    state = session.get(SESSION_KEY)
+    if not state:
+        return
+
+    if event_id is None and poll_id is None:
+        session.pop(SESSION_KEY, None)
+        return
+
+    if event_id is not None:
+        state['events'].pop(str(event_id), None)
+    if poll_id is not None:
+        state['polls'].pop(str(poll_id), None)
+    session[SESSION_KEY] = state
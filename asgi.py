@@ -0,0 +1,67 @@
+"""ASGI giriş noktası
+
+    uvicorn asgi:app --workers 4 --host 0.0.0.0 --port 8000
+
+Flask view'ları senkron çalışır; a2wsgi her isteği gerçek bir thread
+havuzunda (ASGI_THREADS) yürütür, istekler aynı anda işlenir. Uzun süren
+istekler ayrıca yönlendirilir:
+
+  * Dosya yüklemeleri: istek gövdesi event loop üzerinde okunur, view ancak
+    gövde tamamlanınca bir thread'e verilir. Yavaş yükleyen istemci thread
+    tutmaz.
+  * Akışlı yanıt verebilen sayfalar (anket detayı) ayrı bir havuzda
+    (ASGI_STREAM_THREADS) çalışır; yavaş okuyan istemciler kısa istekler
+    için ayrılan thread'leri doldurmaz. Yanıt parçaları sınırlı bir kuyruğa
+    yazılır, istemci okumazsa kuyruk dolunca o thread bekler.
+"""
+import os
+import re
+
+try:
+    from a2wsgi import WSGIMiddleware
+except ImportError as exc:
+    raise ImportError('ASGI modu için a2wsgi gerekli: pip install a2wsgi uvicorn') from exc
+
+from wsgi import app as wsgi_app
+
+# Akışlı render edilebilen ve dosya yükleme alan yollar
+STREAM_PATHS = re.compile(r'^/poll/\d+$')
+UPLOAD_PATHS = re.compile(r'^/(design/upload|profile(/edit)?)$')
+
+pool = WSGIMiddleware(wsgi_app, workers=int(os.environ.get('ASGI_THREADS', 16)))
+stream_pool = WSGIMiddleware(wsgi_app, workers=int(os.environ.get('ASGI_STREAM_THREADS', 8)))
+
+async def _buffer_body(receive, limit):
+    """İstek gövdesini event loop üzerinde oku, view'a tek mesaj olarak ver.
+
+    Gövde MAX_CONTENT_LENGTH'i aşarsa okuma bırakılır; kalanı view'da
+    okunur ve Flask 413 döndürür. İstemci koparsa None döner.
+    """
+    chunks, size, more_body = [], 0, True
+    while more_body and size <= limit:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        chunks.append(message.get('body', b''))
+        size += len(chunks[-1])
+        more_body = message.get('more_body', False)
+
+    first = {'type': 'http.request', 'body': b''.join(chunks), 'more_body': more_body}
+
+    async def replay():
+        nonlocal first
+        if first is not None:
+            message, first = first, None
+            return message
+        return await receive()
+    return replay
+
+async def app(scope, receive, send):
+    if scope['type'] == 'http':
+        if scope['method'] == 'POST' and UPLOAD_PATHS.match(scope['path']):
+            receive = await _buffer_body(receive, wsgi_app.config['MAX_CONTENT_LENGTH'])
+            if receive is None:
+                return
+        if STREAM_PATHS.match(scope['path']):
+            return await stream_pool(scope, receive, send)
+    await pool(scope, receive, send)
@@ -0,0 +1,935 @@
+"""Wegtu performans ölçümleri ve stres testleri
+
+Her senaryo geçici bir SQLite veritabanı üzerinde çalışır, gerçek veriye dokunmaz.
+
+Kullanım:
+    python benchmark.py tickets --users 50 --attempts 8
+    python benchmark.py capacity --users 2000 --capacity 500
+    python benchmark.py http --modes werkzeug gunicorn uvicorn --duration 10
+    python benchmark.py templates --comments 300
+    python benchmark.py wire --comments 1000
+    python benchmark.py retier --users 1000000
+    python benchmark.py jobs --votes 500 --concurrency 4
+    python benchmark.py archive --votes 200000 --comments 500
+    python benchmark.py notifications --subscriptions 5000 --comments 200000
+    python benchmark.py startup --budget-ms 80
+    python benchmark.py scale --nodes 1 2 4 --duration 10
+"""
+import argparse
+import asyncio
+import http.cookiejar
+import itertools
+import importlib.util
+import json
+import os
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+from datetime import datetime, timedelta
+
+from app import create_app, db
+
+def make_app(tmpdir, **config):
+    """Geçici veritabanıyla uygulama oluştur"""
+    settings = {
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(tmpdir, 'bench.db'),
+        'SQLALCHEMY_ENGINE_OPTIONS': {'connect_args': {'timeout': 30}},
+        'WTF_CSRF_ENABLED': False,
+        'RATELIMIT_ENABLED': False,
+        'TESTING': True
+    }
+    settings.update(config)
+    app = create_app(settings)
+    with app.app_context():
+        db.create_all()
+    return app
+
+def make_users(count, tier=1, xp=0):
+    """Toplu test kullanıcısı oluştur (şifre hash'i atlanır)"""
+    from app.models import User
+    users = [User(username=f'bench{i}', email=f'bench{i}@wegtu.com', password_hash='-', tier=tier, xp=xp)
+             for i in range(count)]
+    db.session.add_all(users)
+    db.session.commit()
+    return [user.id for user in users]
+
+def run_concurrently(app, tasks, threads):
+    """Görevleri thread havuzunda çalıştır, (süre, hatalar) döndür"""
+    errors = []
+    lock = threading.Lock()
+    queue = list(tasks)
+
+    def worker():
+        while True:
+            with lock:
+                if not queue:
+                    return
+                task = queue.pop()
+            with app.app_context():
+                try:
+                    task()
+                except Exception as exc:  # Stres testinde tüm hataları raporla
+                    db.session.rollback()
+                    with lock:
+                        errors.append(repr(exc))
+                finally:
+                    db.session.remove()
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return time.perf_counter() - started, errors
+
+def race_pair(app, task):
+    """Aynı görevi iki thread'de aynı anda başlat, hataları döndür"""
+    barrier = threading.Barrier(2)
+    errors = []
+
+    def worker(n):
+        with app.app_context():
+            try:
+                barrier.wait()
+                task(n)
+            except Exception as exc:
+                db.session.rollback()
+                errors.append(repr(exc))
+            finally:
+                db.session.remove()
+
+    pair = [threading.Thread(target=worker, args=(n,)) for n in range(2)]
+    for thread in pair:
+        thread.start()
+    for thread in pair:
+        thread.join()
+    return errors
+
+def bench_tickets(args):
+    """Eşzamanlı bilet kesme: her kullanıcıya tam bir bilet ve bir XP ödülü"""
+    from app.models import User, Event, EventTicket
+    from app.tickets import issue_ticket
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        app = make_app(tmpdir)
+        with app.app_context():
+            user_ids = make_users(args.users)
+            event = Event(title='Stres', event_date=datetime.utcnow() + timedelta(days=1),
+                          ticket_xp_reward=20, created_by_user_id=user_ids[0])
+            db.session.add(event)
+            db.session.commit()
+            event_id = event.id
+
+        def attempt(user_id, key):
+            def task():
+                issue_ticket(user_id, db.session.get(Event, event_id), key)
+            return task
+
+        # Her kullanıcı için aynı key ile tekrar denemeler + farklı key'li çift tıklamalar
+        tasks = []
+        for user_id in user_ids:
+            for n in range(args.attempts):
+                tasks.append(attempt(user_id, f'key-{user_id}-{n % 2}'))
+
+        elapsed, errors = run_concurrently(app, tasks, args.threads)
+
+        with app.app_context():
+            tickets = EventTicket.query.filter_by(event_id=event_id).count()
+            wrong_xp = User.query.filter(User.xp != 20).count()
+            sold = db.session.get(Event, event_id).tickets_sold
+
+        print(f'{len(tasks)} istek, {args.threads} thread: {elapsed:.2f}s ({len(tasks) / elapsed:.0f} istek/s)')
+        print(f'Bilet: {tickets}/{len(user_ids)} (sayaç {sold}), hatalı XP: {wrong_xp}, hata: {len(errors)}')
+        for error in errors[:5]:
+            print('  ' + error)
+        ok = tickets == sold == len(user_ids) and wrong_xp == 0 and not errors
+
+        # Aynı kullanıcının iki isteği bariyerle aynı anda başlar (çift tıklama).
+        # Her yarıştan sonra tam bir bilet ve bir sayaç artışı olmalı.
+        failed = []
+        for race in range(args.races):
+            with app.app_context():
+                event = Event(title=f'Yarış {race}', event_date=datetime.utcnow() + timedelta(days=1),
+                              capacity=10, ticket_xp_reward=20, created_by_user_id=user_ids[0])
+                db.session.add(event)
+                db.session.commit()
+                race_event_id = event.id
+            user_id = user_ids[race % len(user_ids)]
+            race_errors = race_pair(app, lambda n: issue_ticket(user_id, db.session.get(Event, race_event_id), f'race-{race}-{n}'))
+            with app.app_context():
+                tickets = EventTicket.query.filter_by(event_id=race_event_id, user_id=user_id).count()
+                sold = db.session.get(Event, race_event_id).tickets_sold
+            if race_errors or tickets != 1 or sold != 1:
+                failed.append(f'yarış {race}: bilet {tickets}, sayaç {sold}, hata {race_errors[:1]}')
+        print(f'Yarış: {args.races - len(failed)}/{args.races} doğru')
+        for failure in failed[:5]:
+            print('  ' + failure)
+        return ok and not failed
+
+def bench_capacity(args):
+    """Kontenjanlı etkinlikte ani talep: bilet/saniye ve fazla satış kontrolü"""
+    from app.models import Event, EventTicket, EventWaitlist
+    from app.tickets import issue_ticket
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        app = make_app(tmpdir)
+        with app.app_context():
+            user_ids = make_users(args.users)
+            event = Event(title='Drop', event_date=datetime.utcnow() + timedelta(days=1),
+                          capacity=args.capacity, created_by_user_id=user_ids[0])
+            db.session.add(event)
+            db.session.commit()
+            event_id = event.id
+
+        def attempt(user_id):
+            def task():
+                issue_ticket(user_id, db.session.get(Event, event_id))
+            return task
+
+        elapsed, errors = run_concurrently(app, [attempt(user_id) for user_id in user_ids], args.threads)
+
+        with app.app_context():
+            tickets = EventTicket.query.filter_by(event_id=event_id).count()
+            waitlisted = EventWaitlist.query.filter_by(event_id=event_id).count()
+            sold = db.session.get(Event, event_id).tickets_sold
+
+        oversold = max(tickets - args.capacity, 0)
+        print(f'{args.users} istek, {args.threads} thread: {elapsed:.2f}s ({args.users / elapsed:.0f} istek/s, '
+              f'{tickets / elapsed:.0f} bilet/s)')
+        print(f'Bilet: {tickets}/{args.capacity} (sayaç {sold}), bekleme listesi: {waitlisted}, '
+              f'fazla satış: {oversold}, hata: {len(errors)}')
+        for error in errors[:5]:
+            print('  ' + error)
+        expected = min(args.users, args.capacity)
+        return tickets == sold == expected and tickets + waitlisted == args.users and not errors
+
+def seed_feed(polls=20, events=20, comments=0):
+    """Akış ve anket sayfaları için örnek içerik oluştur"""
+    from app.models import Poll, Event, Comment
+
+    user_id = make_users(1, tier=3)[0]
+    now = datetime.utcnow()
+    for i in range(polls):
+        db.session.add(Poll(title=f'Anket {i}', description='Açıklama ' * 20,
+                            created_at=now - timedelta(hours=i), created_by_user_id=user_id))
+    for i in range(events):
+        db.session.add(Event(title=f'Etkinlik {i}', description='Detay ' * 20, location='İstanbul',
+                             event_date=now + timedelta(days=i), capacity=100, created_by_user_id=user_id))
+    db.session.flush()
+    for i in range(comments):
+        db.session.add(Comment(body=f'Yorum {i} ' * 10, user_id=user_id, poll_id=1))
+    db.session.commit()
+
+def percentile(values, pct):
+    """Yüzdelik değer; hiç ölçüm yoksa (tüm istekler hatalı) nan"""
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+def load_test(url, duration, concurrency, headers=None):
+    """URL'ye süre boyunca eşzamanlı GET at, (istek/s, gecikmeler ms, hata) döndür"""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(urllib.request.Request(url, headers=headers or {}), timeout=30) as response:
+                    response.read()
+            except Exception:
+                with lock:
+                    errors[0] += 1
+                continue
+            with lock:
+                latencies.append((time.perf_counter() - started) * 1000)
+
+    pool = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return len(latencies) / (time.perf_counter() - started), latencies, errors[0]
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def wait_for_port(port, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+SERVER_MODES = {
+    'werkzeug': ((), lambda port, workers: [
+        sys.executable, '-c', f'from wsgi import app; app.run(port={port}, threaded=True)']),
+    'gunicorn': (('gunicorn',), lambda port, workers: [
+        sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '-b', f'127.0.0.1:{port}',
+        '-w', str(workers), '--access-logfile', '/dev/null', 'wsgi:app']),
+    'uvicorn': (('uvicorn', 'a2wsgi'), lambda port, workers: [
+        sys.executable, '-m', 'uvicorn', 'asgi:app', '--port', str(port), '--workers', str(workers),
+        '--no-access-log', '--log-level', 'warning']),
+}
+
+def bench_http(args):
+    """Sunucu modlarını (dev, gunicorn, uvicorn) istek/s ve kuyruk gecikmesiyle karşılaştır"""
+    if args.url:
+        rps, latencies, errors = load_test(args.url, args.duration, args.concurrency)
+        print(f'{args.url}: {rps:.0f} istek/s, p50 {percentile(latencies, 50):.1f}ms, '
+              f'p99 {percentile(latencies, 99):.1f}ms, hata {errors}')
+        return errors == 0
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        app = make_app(tmpdir)
+        with app.app_context():
+            seed_feed()
+        env = dict(os.environ, DATABASE_URL=app.config['SQLALCHEMY_DATABASE_URI'], FLASK_DEBUG='0')
+
+        print(f'{"mod":<10} {"istek/s":>9} {"p50 ms":>8} {"p99 ms":>8} {"hata":>5}')
+        for mode in args.modes:
+            modules, command = SERVER_MODES[mode]
+            missing = [module for module in modules if importlib.util.find_spec(module) is None]
+            if missing:
+                print(f'{mode:<10} atlandı ({", ".join(missing)} kurulu değil)')
+                continue
+
+            port = free_port()
+            server = subprocess.Popen(command(port, args.workers), env=env,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                if not wait_for_port(port):
+                    print(f'{mode:<10} başlatılamadı')
+                    continue
+                url = f'http://127.0.0.1:{port}{args.path}'
+                load_test(url, 1, args.concurrency)  # Isınma
+                rps, latencies, errors = load_test(url, args.duration, args.concurrency)
+                print(f'{mode:<10} {rps:>9.0f} {percentile(latencies, 50):>8.1f} '
+                      f'{percentile(latencies, 99):>8.1f} {errors:>5}')
+            finally:
+                server.terminate()
+                server.wait()
+
+def login_client(app, user_id):
+    """Oturumu açılmış test istemcisi"""
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    return client
+
+def time_requests(client, path, count, before=None):
+    """Aynı sayfayı `count` kez iste, ortalama süreyi ms olarak döndür"""
+    total = 0
+    for _ in range(count):
+        if before:
+            before()
+        started = time.perf_counter()
+        response = client.get(path)
+        total += time.perf_counter() - started
+        response.close()  # Akışlı yanıtın context'leri burada kapansın
+        assert response.status_code == 200, response.status_code
+    return total / count * 1000
+
+def bench_templates(args):
+    """Akış ve anket detay sayfalarının render süresi (parça önbelleği soğuk/sıcak)"""
+    from app.templating import fragment_cache
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        app = make_app(tmpdir)
+        with app.app_context():
+            seed_feed(comments=args.comments)
+        client = login_client(app, 1)
+
+        print(f'{"sayfa":<22} {"soğuk ms":>9} {"sıcak ms":>9} {"oran":>6}')
+        for label, path in (('akış', '/forum'), (f'anket ({args.comments} yorum)', '/poll/1')):
+            client.get(path)  # Şablon derleme ve bytecode önbelleği
+            cold = time_requests(client, path, args.repeat, before=fragment_cache.clear)
+            warm = time_requests(client, path, args.repeat)
+            print(f'{label:<22} {cold:>9.2f} {warm:>9.2f} {warm / cold:>6.2f}')
+
+def first_byte(client, path, headers):
+    """(ilk bayta kadar geçen ms, toplam ms, aktarılan bayt)"""
+    started = time.perf_counter()
+    response = client.get(path, headers=headers, buffered=False)
+    chunks = iter(response.response)
+    size = len(next(chunks, b''))
+    ttfb = (time.perf_counter() - started) * 1000
+    size += sum(len(chunk) for chunk in chunks)
+    total = (time.perf_counter() - started) * 1000
+    response.close()
+    return ttfb, total, size
+
+def bench_wire(args):
+    """Sıkıştırma ve akışlı render: aktarılan bayt ve ilk bayta kadar geçen süre"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        variants = (
+            ('düz', {'COMPRESS_ENABLED': False, 'STREAM_COMMENTS_THRESHOLD': 10 ** 9}),
+            ('gzip', {'STREAM_COMMENTS_THRESHOLD': 10 ** 9}),
+            ('gzip + akış', {'STREAM_COMMENTS_THRESHOLD': 100}),
+        )
+        app = make_app(tmpdir)
+        with app.app_context():
+            seed_feed(comments=args.comments)
+        database = app.config['SQLALCHEMY_DATABASE_URI']
+
+        print(f'{"sayfa":<10} {"mod":<12} {"bayt":>9} {"ttfb ms":>8} {"toplam ms":>10}')
+        for label, config in variants:
+            variant = make_app(tmpdir, SQLALCHEMY_DATABASE_URI=database, **config)
+            client = login_client(variant, 1)
+            for page, path in (('akış', '/forum'), ('anket', '/poll/1'), ('css', '/static/css/style.css')):
+                first_byte(client, path, {'Accept-Encoding': 'gzip'})  # Isınma
+                results = [first_byte(client, path, {'Accept-Encoding': 'gzip'}) for _ in range(args.repeat)]
+                ttfb = sum(r[0] for r in results) / len(results)
+                total = sum(r[1] for r in results) / len(results)
+                print(f'{page:<10} {label:<12} {results[0][2]:>9} {ttfb:>8.2f} {total:>10.2f}')
+
+def bench_retier(args):
+    """Tier kuralları değişince toplu yeniden hesaplama (ilerleme raporlu)"""
+    import random
+    from sqlalchemy import literal, select
+    from app.models import User, Vote, Poll, PollOption, Design
+    from app.tiers import tier_rules, recompute_tiers
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        app = make_app(tmpdir)
+        with app.app_context():
+            started = time.perf_counter()
+            rng = random.Random(1)
+            db.session.execute(User.__table__.insert(), [
+                {'username': f'u{i}', 'email': f'u{i}@wegtu.com', 'password_hash': '-',
+                 'tier': 1, 'xp': rng.randint(0, 1000)}
+                for i in range(args.users)
+            ])
+            db.session.add(Design(title='D', image_path='d.png', user_id=1))
+            db.session.add(Poll(title='P', created_by_user_id=1))
+            db.session.flush()
+            db.session.add(PollOption(poll_id=1, design_id=1))
+            voter_tiers = [rng.randint(1, 3) for _ in range(args.votes)]
+            db.session.execute(Vote.__table__.insert(), [
+                {'user_id': user_id, 'poll_id': 1, 'poll_option_id': 1, 'voter_tier': tier,
+                 'weight': tier_rules.vote_weight(tier), 'created_at': datetime.utcnow()}
+                for user_id, tier in enumerate(voter_tiers, start=1)
+            ])
+            db.session.commit()
+            print(f'{args.users} kullanıcı, {args.votes} oy hazırlandı ({time.perf_counter() - started:.1f}s)')
+
+            # Eşikleri değiştir: Tier 2 için 50, Tier 3 için 300 XP
+            tier_rules.load([
+                {'tier': 1, 'min_xp': 0, 'vote_weight': 1},
+                {'tier': 2, 'min_xp': 50, 'vote_weight': 2},
+                {'tier': 3, 'min_xp': 300, 'vote_weight': 4},
+            ])
+            started = time.perf_counter()
+            users, votes = recompute_tiers(args.batch_size)
+            elapsed = time.perf_counter() - started
+            print(f'{users} kullanıcı, {votes} oy güncellendi: {elapsed:.1f}s')
+
+            wrong = User.query.filter(User.tier != tier_rules.tier_case(User.xp)).count()
+            # Ağırlık oy anındaki tier'dan gelir, oy verenin bugünkü tier'ından değil
+            wrong_weight = sum(
+                count for tier, weight, count in
+                db.session.query(Vote.voter_tier, Vote.weight, db.func.count()).group_by(Vote.voter_tier, Vote.weight)
+                if weight != tier_rules.vote_weight(tier)
+            )
+            print(f'Hatalı tier: {wrong}, hatalı oy ağırlığı: {wrong_weight}')
+
+            # SQL CASE ile Python vote_weight aynı tier'lara aynı ağırlığı vermeli;
+            # üst tier kaldırılınca veya arada boşluk kalınca da
+            mismatches = []
+            for rules in (
+                tier_rules.rules,
+                [{'tier': 1, 'min_xp': 0, 'vote_weight': 1}, {'tier': 3, 'min_xp': 300, 'vote_weight': 4}],
+                [{'tier': 1, 'min_xp': 0, 'vote_weight': 1}, {'tier': 2, 'min_xp': 50, 'vote_weight': 2}],
+            ):
+                tier_rules.load(rules)
+                for tier in range(-1, tier_rules.max_tier + 3):
+                    in_sql = db.session.scalar(select(tier_rules.weight_case(literal(tier))))
+                    if in_sql != tier_rules.vote_weight(tier):
+                        mismatches.append(f'tier {tier}: SQL {in_sql}, Python {tier_rules.vote_weight(tier)}')
+
+            # Tier 3 kurallardan çıkarılınca o tier'daki oylar sıfırlanmaz
+            recompute_tiers(args.batch_size)
+            zeroed = Vote.query.filter(Vote.weight == 0).count()
+            print(f'CASE/vote_weight uyuşmazlığı: {len(mismatches)}, üst tier kaldırılınca sıfırlanan oy: {zeroed}')
+            for mismatch in mismatches[:5]:
+                print('  ' + mismatch)
+            return wrong == 0 and wrong_weight == 0 and not mismatches and zeroed == 0
+
+def bench_jobs(args):
+    """Oy isteğinin gecikmesi: yan etkiler istek içinde vs kuyrukta, worker hızı"""
+    from app.models import User, Poll, PollOption, Design
+    from app.jobs import Worker, job_stats
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        app = make_app(tmpdir)
+        with app.app_context():
+            seed_feed(polls=2, events=0)
+            db.session.add(Design(title='D', image_path='d.png', user_id=1))
+            db.session.flush()
+            for poll_id in (1, 2):
+                db.session.add(PollOption(poll_id=poll_id, design_id=1))
+            db.session.execute(User.__table__.insert(), [
+                {'username': f'voter{i}', 'email': f'voter{i}@wegtu.com', 'password_hash': '-', 'tier': 1, 'xp': 0}
+                for i in range(args.votes)
+            ])
+            db.session.commit()
+            user_ids = [user_id for (user_id,) in db.session.query(User.id).filter(User.username.like('voter%'))]
+        database = app.config['SQLALCHEMY_DATABASE_URI']
+
+        print(f'{"mod":<8} {"p50 ms":>8} {"p99 ms":>8}')
+        for poll_id, (label, eager) in enumerate((('istek', True), ('kuyruk', False)), start=1):
+            variant = make_app(tmpdir, SQLALCHEMY_DATABASE_URI=database, JOBS_EAGER=eager)
+            timings = []
+            for user_id in user_ids:
+                client = login_client(variant, user_id)
+                started = time.perf_counter()
+                response = client.post(f'/poll/{poll_id}', data={'poll_option': poll_id, 'vote': '1'})
+                timings.append((time.perf_counter() - started) * 1000)
+                assert response.status_code == 302, response.status_code
+            print(f'{label:<8} {percentile(timings, 50):>8.2f} {percentile(timings, 99):>8.2f}')
+
+        started = time.perf_counter()
+        processed = Worker(variant, concurrency=args.concurrency, burst=True).run()
+        elapsed = time.perf_counter() - started
+        print(f'Worker: {processed} iş, {elapsed:.2f}s ({processed / elapsed:.0f} iş/s)')
+
+        with variant.app_context():
+            for name, values in sorted(job_stats().items()):
+                print(f'  {name}: {values}')
+            # Her kullanıcı iki ankete oy verdi: 2 * 5 XP
+            wrong = User.query.filter(User.id.in_(user_ids), User.xp != 10).count()
+            print(f'Hatalı XP: {wrong}')
+            return wrong == 0
+
+def bench_archive(args):
+    """Kapanmış anketi arşivle: sıcak tablo boyutu, dosya boyutu, sonuç sayfası süresi"""
+    import random
+    from app.models import User, Vote, Poll, PollOption, Design
+    from app.archive import archive_poll, read_vote_columns
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        app = make_app(tmpdir, ARCHIVE_FOLDER=os.path.join(tmpdir, 'archive'))
+        with app.app_context():
+            seed_feed(polls=1, events=0, comments=args.comments)
+            db.session.add(Design(title='D', image_path='d.png', user_id=1))
+            db.session.flush()
+            for _ in range(4):
+                db.session.add(PollOption(poll_id=1, design_id=1))
+            rng = random.Random(1)
+            db.session.execute(User.__table__.insert(), [
+                {'username': f'u{i}', 'email': f'u{i}@wegtu.com', 'password_hash': '-', 'tier': 1, 'xp': 0}
+                for i in range(args.votes)
+            ])
+            db.session.execute(Vote.__table__.insert(), [
+                {'user_id': user_id, 'poll_id': 1, 'poll_option_id': rng.randint(1, 4),
+                 'weight': rng.choice((1, 3, 5)), 'created_at': datetime.utcnow()}
+                for user_id in range(2, args.votes + 2)
+            ])
+            db.session.get(Poll, 1).is_active = False
+            db.session.commit()
+            expected = dict(db.session.query(Vote.poll_option_id, db.func.sum(Vote.weight)).group_by(Vote.poll_option_id))
+
+        client = login_client(app, 1)
+        client.get('/poll/1')
+        before = time_requests(client, '/poll/1', args.repeat)
+
+        with app.app_context():
+            started = time.perf_counter()
+            archive = archive_poll(db.session.get(Poll, 1), echo=print)
+            elapsed = time.perf_counter() - started
+            header, columns = read_vote_columns(archive.votes_path)
+            hot_votes = Vote.query.count()
+            tallies = {int(option_id): tally['total_weight'] for option_id, tally in json.loads(archive.tallies).items()}
+            print(f'Arşivleme: {elapsed:.2f}s, dosya {archive.size_bytes} bayt '
+                  f'({archive.size_bytes / max(archive.vote_count, 1):.2f} bayt/oy), sıcak tabloda {hot_votes} oy kaldı')
+
+        client.get('/poll/1')
+        after = time_requests(client, '/poll/1', args.repeat)
+        print(f'Anket sayfası: sıcak {before:.2f} ms, arşiv {after:.2f} ms')
+
+        ok = hot_votes == 0 and header['rows'] == args.votes and tallies == expected
+        print(f'Sonuçlar {"tutarlı" if ok else "TUTARSIZ"}')
+        return ok
+
+def bench_notifications(args):
+    """Binlerce aboneliği olan kullanıcı için okunmamış sayısı ve bildirim sayfası"""
+    import random
+    from app.models import User, Vote, Poll, PollOption, Design, Comment, Event, EventTicket
+    from app.notifications import unread_count, mark_seen
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        app = make_app(tmpdir)
+        with app.app_context():
+            started = time.perf_counter()
+            rng = random.Random(1)
+            now = datetime.utcnow()
+            reader, other = make_users(2)
+            db.session.add(Design(title='D', image_path='d.png', user_id=other))
+            polls = args.subscriptions * 2  # Yarısına abone, yarısına değil
+            db.session.execute(Poll.__table__.insert(), [
+                {'title': f'Anket {i}', 'created_by_user_id': other, 'is_active': True,
+                 'created_at': now, 'updated_at': now}
+                for i in range(polls)
+            ])
+            db.session.execute(PollOption.__table__.insert(), [
+                {'poll_id': poll_id, 'design_id': 1} for poll_id in range(1, polls + 1)
+            ])
+            db.session.execute(Vote.__table__.insert(), [
+                {'user_id': reader, 'poll_id': poll_id, 'poll_option_id': poll_id, 'weight': 1, 'created_at': now}
+                for poll_id in range(1, args.subscriptions + 1)
+            ])
+            db.session.execute(Comment.__table__.insert(), [
+                {'body': 'Yorum', 'user_id': other, 'poll_id': rng.randint(1, polls),
+                 'timestamp': now - timedelta(minutes=rng.randint(0, 60 * 24 * 20))}
+                for _ in range(args.comments)
+            ])
+            db.session.execute(Event.__table__.insert(), [
+                {'title': f'Etkinlik {i}', 'event_date': now + timedelta(days=7), 'created_by_user_id': other,
+                 'tickets_sold': 1, 'created_at': now, 'updated_at': now - timedelta(days=i % 20)}
+                for i in range(args.events)
+            ])
+            db.session.execute(EventTicket.__table__.insert(), [
+                {'event_id': event_id, 'user_id': reader, 'ticket_number': f'TKT-{event_id}',
+                 'created_at': now - timedelta(days=30)}
+                for event_id in range(1, args.events + 1)
+            ])
+            db.session.commit()
+            mark_seen(reader, now - timedelta(days=1))
+            print(f'{args.subscriptions} abonelik, {args.comments} yorum, {args.events} bilet hazırlandı '
+                  f'({time.perf_counter() - started:.1f}s)')
+
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                count = unread_count(reader)
+                timings.append((time.perf_counter() - started) * 1000)
+            print(f'Okunmamış sayısı ({count}): p50 {percentile(timings, 50):.2f} ms, p99 {percentile(timings, 99):.2f} ms')
+
+        client = login_client(app, reader)
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            response = client.get('/notifications/unread-count')
+            timings.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200, response.status_code
+        print(f'/notifications/unread-count: p50 {percentile(timings, 50):.2f} ms, p99 {percentile(timings, 99):.2f} ms')
+
+        page = time_requests(client, '/notifications', 3)
+        print(f'/notifications (ilk ziyaret dahil ortalama): {page:.2f} ms')
+        return client.get('/notifications/unread-count').json['count'] == 0
+
+STARTUP_MODES = {
+    'cli': 'from app import create_app; create_app(with_views=False)',
+    'web': 'from app import create_app; create_app()',
+}
+
+def measure_startup(snippet):
+    """`python -X importtime` ile (duvar ms, import ms, {app modülü: kendi ms}) ölç"""
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', snippet],
+                            cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True, check=True)
+    wall = (time.perf_counter() - started) * 1000
+
+    imports = 0
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        if not name[1:].startswith(' '):  # En üst seviye import
+            imports += int(cumulative_us)
+        name = name.strip()
+        if name == 'app' or name.startswith('app.'):
+            modules[name] = int(self_us) / 1000
+    return wall, imports / 1000, modules
+
+def bench_startup(args):
+    """CLI/worker ve web süreçlerinin açılış süresi; CLI için bütçe kontrolü.
+
+    Bütçe uygulamanın kendi modüllerinin import süresine uygulanır; Flask ve
+    SQLAlchemy'nin payı makineye göre değişir ve buradan azaltılamaz.
+    """
+    ok = True
+    print(f'{"mod":<6} {"duvar ms":>9} {"import ms":>10} {"app ms":>7}  en pahalı app modülleri')
+    for mode in args.modes:
+        measure_startup(STARTUP_MODES[mode])  # .pyc ve Jinja önbelleği ısınsın
+        runs = [measure_startup(STARTUP_MODES[mode]) for _ in range(args.repeat)]
+        wall = percentile([run[0] for run in runs], 50)
+        imports = percentile([run[1] for run in runs], 50)
+        own = percentile([sum(run[2].values()) for run in runs], 50)
+        slowest = sorted(runs[-1][2].items(), key=lambda item: -item[1])[:4]
+        print(f'{mode:<6} {wall:>9.1f} {imports:>10.1f} {own:>7.1f}  '
+              + ', '.join(f'{name} {ms:.1f}' for name, ms in slowest))
+        if mode == 'cli' and own > args.budget_ms:
+            print(f'CLI açılışında app modülleri bütçeyi aşıyor: {own:.1f} ms > {args.budget_ms} ms')
+            ok = False
+    return ok
+
+class RoundRobinProxy:
+    """Bağlantıları sırayla backend'lere dağıtan yerel TCP proxy (load balancer yerine)"""
+
+    def __init__(self, backends):
+        self.backends = backends
+        self.port = free_port()
+        self.connections = dict.fromkeys(backends, 0)
+        self._writers = set()
+        self._next = itertools.cycle(backends)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    async def _pipe(self, reader, writer):
+        try:
+            while data := await reader.read(65536):
+                writer.write(data)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            self._writers.discard(writer)
+
+    async def _handle(self, client_reader, client_writer):
+        backend = next(self._next)
+        self.connections[backend] += 1
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', backend)
+        except OSError:
+            client_writer.close()
+            return
+        self._writers.update((writer, client_writer))
+        await asyncio.gather(self._pipe(client_reader, writer), self._pipe(reader, client_writer))
+
+    def start(self):
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle, '127.0.0.1', self.port, backlog=1024))
+        self._thread.start()
+
+    async def _shutdown(self):
+        # Açık kalan bağlantılar loop kapanmadan kapatılır, aktarımlar kendiliğinden biter
+        self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stop(self):
+        if self._thread.is_alive():
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+        self._loop.close()
+
+def wait_until_ready(port, timeout=30):
+    """/readyz 200 dönene kadar bekle"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/readyz', timeout=2) as response:
+                if response.status == 200:
+                    return True
+        except OSError:
+            pass
+        time.sleep(0.2)
+    return False
+
+def login_over_http(base_url, email, password):
+    """Gerçek login formuyla (CSRF dahil) giriş yap, oturum cookie'sini döndür"""
+    jar = http.cookiejar.CookieJar()
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar))
+    with opener.open(base_url + '/auth/login', timeout=30) as response:
+        token = re.search(r'name="csrf_token" type="hidden" value="([^"]+)"', response.read().decode()).group(1)
+    data = urllib.parse.urlencode({'csrf_token': token, 'email': email, 'password': password}).encode()
+    with opener.open(base_url + '/auth/login', data=data, timeout=30):
+        pass
+    return '; '.join(f'{cookie.name}={cookie.value}' for cookie in jar)
+
+def bench_scale(args):
+    """Paylaşılan oturum deposu ve veritabanıyla 1..N uygulama sunucusu arkasında verim.
+
+    Her düğüm ayrı bir tek süreçli gunicorn'dur; istekler yerel round-robin
+    proxy üzerinden dağıtılır. Oturum bir düğümde açılır, diğerlerinde de
+    geçerli olmalıdır. Doğrusal ölçekleme için düğüm sayısı kadar boş
+    çekirdek gerekir; yük üreten bu süreç de CPU kullanır.
+    """
+    if importlib.util.find_spec('gunicorn') is None:
+        print('gunicorn kurulu değil, senaryo atlandı')
+        return True
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        app = make_app(tmpdir)
+        with app.app_context():
+            from app.models import User
+            seed_feed()
+            user = User(username='scale', email='scale@wegtu.com', tier=1)
+            user.set_password('scale123')
+            db.session.add(user)
+            db.session.commit()
+
+        env = dict(os.environ, DATABASE_URL=app.config['SQLALCHEMY_DATABASE_URI'], SECRET_KEY='bench-scale',
+                   SESSION_STORAGE_URL='sql', UPLOAD_FOLDER=os.path.join(tmpdir, 'uploads'),
+                   FLASK_DEBUG='0', WEB_CONCURRENCY='1', GUNICORN_THREADS=str(args.threads))
+        os.makedirs(env['UPLOAD_FOLDER'])
+        if args.replica:
+            # Gerçek replikasyon yok: veriler değişmediği için kopya dosya yeterli
+            replica_path = os.path.join(tmpdir, 'replica.db')
+            shutil.copy(os.path.join(tmpdir, 'bench.db'), replica_path)
+            env['DATABASE_REPLICA_URL'] = 'sqlite:///' + replica_path
+
+        cores = os.cpu_count()
+        print(f'{cores} çekirdek, düğüm başına 1 süreç x {args.threads} thread, yol {args.path}')
+        print(f'{"düğüm":>5} {"istek/s":>9} {"hızlanma":>9} {"verim":>6} {"p50 ms":>8} {"p99 ms":>8} {"hata":>5}')
+        ok, baseline = True, None
+        for count in args.nodes:
+            ports = [free_port() for _ in range(count)]
+            servers = [
+                subprocess.Popen(SERVER_MODES['gunicorn'][1](port, 1), env=env,
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                for port in ports
+            ]
+            proxy = RoundRobinProxy(ports)
+            try:
+                if not all(wait_until_ready(port) for port in ports):
+                    print(f'{count:>5} düğüm hazır olmadı')
+                    ok = False
+                    continue
+                proxy.start()
+                base_url = f'http://127.0.0.1:{proxy.port}'
+
+                # Oturum bir düğümde açılır, sıradaki isteklerin hepsi başka düğümlere düşer
+                cookie = login_over_http(base_url, 'scale@wegtu.com', 'scale123')
+                headers = {'Cookie': cookie}
+                shared = 0
+                for _ in range(2 * count):
+                    with urllib.request.urlopen(urllib.request.Request(base_url + '/profile', headers=headers),
+                                                timeout=30) as response:
+                        shared += response.geturl().endswith('/profile')
+                if shared != 2 * count:
+                    print(f'{count:>5} oturum düğümler arasında paylaşılmıyor ({shared}/{2 * count})')
+                    ok = False
+
+                url = base_url + args.path
+                load_test(url, 1, args.concurrency, headers)  # Isınma
+                rps, latencies, errors = load_test(url, args.duration, args.concurrency, headers)
+                baseline = baseline or rps / count
+                speedup = rps / baseline if baseline else float('nan')
+                efficiency = speedup / count
+                note = ''
+                if count > cores:
+                    note = '  (CPU sınırlı: çekirdekten fazla düğüm)'
+                elif count > 1 and efficiency < args.min_efficiency:
+                    note = f'  (verim {args.min_efficiency:.0%} altında)'
+                    ok = False
+                print(f'{count:>5} {rps:>9.0f} {speedup:>8.2f}x {efficiency:>6.0%} {percentile(latencies, 50):>8.1f} '
+                      f'{percentile(latencies, 99):>8.1f} {errors:>5}{note}')
+                print('      dağılım: ' + ', '.join(str(proxy.connections[port]) for port in ports))
+                ok = ok and errors == 0
+            finally:
+                proxy.stop()
+                for server in servers:
+                    server.terminate()
+                for server in servers:
+                    server.wait()
+        return ok
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='scenario', required=True)
+
+    tickets = sub.add_parser('tickets', help='Eşzamanlı bilet kesme stres testi')
+    tickets.add_argument('--users', type=int, default=50)
+    tickets.add_argument('--attempts', type=int, default=8)
+    tickets.add_argument('--threads', type=int, default=16)
+    tickets.add_argument('--races', type=int, default=50, help='İki eşzamanlı istekli yarış sayısı')
+    tickets.set_defaults(func=bench_tickets)
+
+    capacity = sub.add_parser('capacity', help='Kontenjanlı etkinlik rezervasyon benchmark\'ı')
+    capacity.add_argument('--users', type=int, default=2000)
+    capacity.add_argument('--capacity', type=int, default=500)
+    capacity.add_argument('--threads', type=int, default=32)
+    capacity.set_defaults(func=bench_capacity)
+
+    http = sub.add_parser('http', help='Sunucu modlarının HTTP yük testi')
+    http.add_argument('--modes', nargs='+', choices=sorted(SERVER_MODES), default=['werkzeug', 'gunicorn', 'uvicorn'])
+    http.add_argument('--url', help='Çalışan bir sunucuyu test et (modları başlatmaz)')
+    http.add_argument('--path', default='/forum')
+    http.add_argument('--duration', type=float, default=10)
+    http.add_argument('--concurrency', type=int, default=32)
+    http.add_argument('--workers', type=int, default=os.cpu_count() * 2 + 1)
+    http.set_defaults(func=bench_http)
+
+    templates = sub.add_parser('templates', help='Şablon render mikro benchmark\'ı')
+    templates.add_argument('--comments', type=int, default=300)
+    templates.add_argument('--repeat', type=int, default=50)
+    templates.set_defaults(func=bench_templates)
+
+    wire = sub.add_parser('wire', help='Sıkıştırma/akış: bayt ve ilk bayt süresi')
+    wire.add_argument('--comments', type=int, default=1000)
+    wire.add_argument('--repeat', type=int, default=10)
+    wire.set_defaults(func=bench_wire)
+
+    retier = sub.add_parser('retier', help='Toplu tier/oy ağırlığı yeniden hesaplama')
+    retier.add_argument('--users', type=int, default=200000)
+    retier.add_argument('--votes', type=int, default=100000)
+    retier.add_argument('--batch-size', type=int, default=20000)
+    retier.set_defaults(func=bench_retier)
+
+    jobs = sub.add_parser('jobs', help='Arka plan iş kuyruğu: istek gecikmesi ve worker hızı')
+    jobs.add_argument('--votes', type=int, default=500)
+    jobs.add_argument('--concurrency', type=int, default=4)
+    jobs.set_defaults(func=bench_jobs)
+
+    archive = sub.add_parser('archive', help='Kapanmış anketi arşive taşıma ve arşiv sayfası')
+    archive.add_argument('--votes', type=int, default=200000)
+    archive.add_argument('--comments', type=int, default=500)
+    archive.add_argument('--repeat', type=int, default=10)
+    archive.set_defaults(func=bench_archive)
+
+    notifications = sub.add_parser('notifications', help='Çok abonelikli kullanıcıda bildirim sorguları')
+    notifications.add_argument('--subscriptions', type=int, default=5000)
+    notifications.add_argument('--comments', type=int, default=200000)
+    notifications.add_argument('--events', type=int, default=200)
+    notifications.add_argument('--repeat', type=int, default=50)
+    notifications.set_defaults(func=bench_notifications)
+
+    startup = sub.add_parser('startup', help='Açılış süresi (python -X importtime) ve bütçe kontrolü')
+    startup.add_argument('--modes', nargs='+', choices=sorted(STARTUP_MODES), default=['cli', 'web'])
+    startup.add_argument('--repeat', type=int, default=5)
+    startup.add_argument('--budget-ms', type=float, default=80, help='CLI/worker açılışında app modülleri için üst sınır')
+    startup.set_defaults(func=bench_startup)
+
+    scale = sub.add_parser('scale', help='Paylaşılan oturumla çok düğümlü verim (yerel proxy arkasında)')
+    scale.add_argument('--nodes', nargs='+', type=int, default=[1, 2, 4])
+    scale.add_argument('--path', default='/forum')
+    scale.add_argument('--duration', type=float, default=10)
+    scale.add_argument('--concurrency', type=int, default=16)
+    scale.add_argument('--threads', type=int, default=4)
+    scale.add_argument('--replica', action='store_true', help='GET view\'ları için replika veritabanı kullan')
+    scale.add_argument('--min-efficiency', type=float, default=0.7,
+                       help='Çekirdek sayısını aşmayan düğüm sayılarında beklenen en düşük verim')
+    scale.set_defaults(func=bench_scale)
+
+    args = parser.parse_args()
+    ok = args.func(args)
+    sys.exit(0 if ok in (None, True) else 1)
+
+if __name__ == '__main__':
+    main()
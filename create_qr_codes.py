@@ -2,7 +2,7 @@ from app import create_app, db
 from app.models import QRCode
 import secrets
 
-app = create_app()
+app = create_app(with_views=False)
 
 with app.app_context():
     # Yeni QR kodları oluştur
@@ -2,7 +2,7 @@ from app import create_app, db
 from app.models import User, Design, Poll, PollOption, QRCode
 import secrets
 
-app = create_app()
+app = create_app(with_views=False)
 
 with app.app_context():
     # Veritabanını oluştur
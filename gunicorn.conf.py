@@ -0,0 +1,52 @@
+"""Gunicorn ayarları (gunicorn -c gunicorn.conf.py wsgi:app)
+
+Boyutlandırma:
+  * Her istek SQLite I/O'su ve parola hash'i (CPU) arasında bölünür. Süreç
+    sayısı CPU'yu, thread sayısı I/O beklemesini karşılar.
+  * workers = 2 * CPU + 1 iyi bir başlangıçtır; SQLite tek yazıcıya izin
+    verdiği için yazma yoğun dönemlerde daha fazla süreç yarar sağlamaz.
+  * threads = 4: thread'ler I/O beklerken GIL'i bırakır, login'deki
+    pbkdf2 hash'i ise süreç başına bir çekirdeği meşgul eder.
+  * Eşzamanlı istek kapasitesi ~ workers * threads olur.
+  * Rate limit sayaçları süreç içinde tutulur; birden fazla worker'da tutarlı
+    limit için RATELIMIT_STORAGE_URL bir Redis adresine ayarlanmalıdır.
+  * XP/tier güncellemesi, silme ve analitik işleri istekten çıkarıldı;
+    yanında `flask --app manage worker` çalıştırılmalıdır (bkz. wsgi.py).
+  * Birden fazla sunucuda oturumlar paylaşılan depoda tutulur
+    (SESSION_STORAGE_URL, varsayılan veritabanı); tüm sunuculara aynı
+    SECRET_KEY ve UPLOAD_FOLDER verilir. Load balancer /readyz'yi kontrol
+    eder (bkz. app/config.py, `python benchmark.py scale`).
+  * Load balancer arkasında PROXY_COUNT=1 verilir; yoksa tüm istemciler
+    proxy'nin IP'sini paylaşır ve IP bazlı limitler tek sayaç olur.
+
+Tüm değerler ortam değişkenleriyle ezilebilir (WEB_CONCURRENCY, GUNICORN_THREADS ...).
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+
+# Yavaş istemciler (büyük yüklemeler) worker'ı kilitlemesin diye
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+
+# Bellek sızıntılarına karşı worker'ları periyodik olarak yenile
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = 200
+
+# Uygulamayı master'da bir kez yükle, worker'lar fork ile kopyalasın
+preload_app = True
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+
+def post_fork(server, worker):
+    # Master'da açılmış SQLite bağlantıları fork sonrası paylaşılmamalı
+    from wsgi import app
+    from app import db
+    with app.app_context():
+        db.engine.dispose(close=False)
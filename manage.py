@@ -0,0 +1,13 @@
+"""CLI komutları ve arka plan worker'ı için giriş noktası
+
+Route'lar, formlar ve blueprint'ler yüklenmez; kısa ömürlü komutlar ve
+worker yeniden başlatmaları daha hızlı açılır:
+
+    flask --app manage worker --concurrency 4
+    flask --app manage rollup-votes
+    flask --app manage upgrade-db    # Her sürüm güncellemesinden sonra bir kez
+"""
+from app import create_app
+
+# Ayarlar wsgi.py ile aynı ortam değişkenlerinden okunur (bkz. app/config.py)
+app = create_app(with_views=False)
@@ -1,9 +1,12 @@
-from app import create_app, db
-from app.models import User, Design, Poll, PollOption, Vote, Comment, DesignCheckRequest, QRCode
+import os
+from app import create_app
+from app.schema import upgrade_schema
 
 app = create_app()
 
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
-    app.run(debug=True, port=5001)
+        # Yeni tablolar oluşturulur, eski veritabanına eksik sütun/indeksler eklenir
+        upgrade_schema(echo=print)
+    # Sadece geliştirme sunucusu; üretim için wsgi.py / asgi.py kullanın
+    app.run(debug=os.environ.get('FLASK_DEBUG', '1') == '1', port=int(os.environ.get('PORT', 5001)))
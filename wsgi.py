@@ -0,0 +1,22 @@
+"""Üretim WSGI giriş noktası
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Geliştirme için run.py kullanılır; bu dosya debug modunu açmaz.
+Arka plan işleri (XP, silme, analitik) ayrı bir süreçte çalıştırılmalıdır:
+
+    flask --app manage worker --concurrency 4
+
+Yeni sürüme geçerken sunucular başlatılmadan önce veritabanı yükseltilir:
+
+    flask --app manage upgrade-db
+
+JOBS_EAGER=1 verilirse işler istek içinde çalışır (worker gerekmez).
+Diğer ayarlar (SECRET_KEY, DATABASE_URL, SESSION_STORAGE_URL, ...) ortamdan
+okunur, bkz. app/config.py. Birden fazla sunucuda hepsine aynı ortam verilir.
+"""
+import os
+from app import create_app
+
+# Üretimde işler varsayılan olarak worker'da çalışır
+app = create_app(None if 'JOBS_EAGER' in os.environ else {'JOBS_EAGER': False})